@@ -0,0 +1,38 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ Reports the start-up latency of the polywit command line for common invocations
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+
+INVOCATIONS = {
+    '--version': ['-m', 'polywit', '--version'],
+    '--help': ['-m', 'polywit', '--help'],
+    'java frontend': ['-c', "from polywit.frontends import load_frontend; load_frontend('java')"],
+    'kotlin frontend': ['-c', "from polywit.frontends import load_frontend; load_frontend('kotlin')"],
+}
+
+
+def time_invocation(arguments, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *arguments], stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(repeats=10):
+    for name, arguments in INVOCATIONS.items():
+        timings = time_invocation(arguments, repeats)
+        print(f'{name:<16} median {statistics.median(timings) * 1000:7.1f} ms  '
+              f'min {min(timings) * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,71 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ Reports the time taken to walk the tree of a large generated Kotlin file
+"""
+
+import statistics
+import sys
+import time
+
+from kopyt import Parser, node as kotlin_node
+
+from polywit.kotlin.file_processors import _filter_results
+
+FUNCTION = """
+fun function{index}(flag: Boolean): Int {{
+    val first = Verifier.nondetInt()
+    if (flag) {{
+        for (i in 0..first) {{
+            val second = Verifier.nondetLong()
+        }}
+    }} else {{
+        listOf(1, 2).forEach {{ val third = Verifier.nondetShort() }}
+    }}
+    try {{
+        val fourth = Verifier.nondetBoolean()
+    }} catch (e: Exception) {{
+        val fifth = Verifier.nondetChar()
+    }}
+    return first
+}}
+"""
+
+
+def generate_source(functions, nesting):
+    """
+    Generates a Kotlin file with many functions, and one function with deeply nested blocks
+
+    :param functions: Number of functions
+    :param nesting: Depth of the nested function
+    :return: The source of the file
+    """
+    nested = 'if (flag) {\n' * nesting + 'val deep = Verifier.nondetInt()\n' + '}\n' * nesting
+    return ''.join(FUNCTION.format(index=index) for index in range(functions)) + \
+        f'fun nested(flag: Boolean) {{\n{nested}}}\n'
+
+
+def time_walk(result, with_paths, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        found = sum(1 for _ in _filter_results(result, kotlin_node.PropertyDeclaration, with_paths))
+        timings.append(time.perf_counter() - start)
+    return found, timings
+
+
+def main(functions=1000, nesting=40, repeats=5):
+    source = generate_source(functions, nesting)
+    start = time.perf_counter()
+    result = Parser(source).parse()
+    print(f'parse            {(time.perf_counter() - start) * 1000:9.1f} ms  '
+          f'({len(source.splitlines())} lines)')
+    for with_paths in (False, True):
+        found, timings = time_walk(result, with_paths, repeats)
+        print(f'walk{" with paths" if with_paths else "":<12} median {statistics.median(timings) * 1000:9.1f} ms  '
+              f'({found} properties)')
+
+
+if __name__ == '__main__':
+    main(*(int(argument) for argument in sys.argv[1:]))
@@ -0,0 +1,72 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ Reports the time taken to check the linearity of synthetic witnesses made of chained diamonds,
+ by counting paths and by walking the violation path, against enumerating every simple path as
+ polywit used to
+"""
+
+import sys
+import time
+
+import networkx as nx
+
+from polywit.utils import WitnessGraph
+
+
+def generate_witness(diamonds, chain):
+    """
+    Generates a witness graph of diamonds in a row followed by a linear chain
+
+    :param diamonds: Number of diamonds, each of which doubles the number of paths
+    :param chain: Length of the linear chain after the diamonds
+    :return: The witness graph, with its entry and violation nodes
+    """
+    graph = WitnessGraph()
+    for index in range(diamonds):
+        for branch in ('L', 'R'):
+            graph.add_edge(f'D{index}', f'{branch}{index}', ())
+            graph.add_edge(f'{branch}{index}', f'D{index + 1}', ())
+    for index in range(chain):
+        graph.add_edge(f'D{diamonds + index}', f'D{diamonds + index + 1}', ())
+    return graph, 'D0', f'D{diamonds + chain}'
+
+
+def time_count_paths(graph, entry, violation):
+    start = time.perf_counter()
+    graph.count_paths(entry, violation)
+    return time.perf_counter() - start
+
+
+def time_violation_path(graph, entry, violation):
+    start = time.perf_counter()
+    try:
+        graph.violation_path(entry, violation)
+    except ValueError:
+        pass
+    return time.perf_counter() - start
+
+
+def time_all_simple_paths(graph, entry, violation):
+    topology = nx.MultiDiGraph()
+    topology.add_edges_from(graph.edges())
+    start = time.perf_counter()
+    len(list(nx.all_simple_paths(topology, entry, violation)))
+    return time.perf_counter() - start
+
+
+def main(chain=1000):
+    for diamonds in (2, 4, 8, 10, 100000):
+        graph, entry, violation = generate_witness(diamonds, chain)
+        count_time = time_count_paths(graph, entry, violation)
+        path_time = time_violation_path(graph, entry, violation)
+        # Enumerating the paths of large witnesses takes far too long to measure
+        enumerate_time = time_all_simple_paths(graph, entry, violation) if diamonds <= 10 else None
+        print(f'{diamonds:>6} diamonds  count_paths {count_time * 1000:9.1f} ms  '
+              f'violation_path {path_time * 1000:9.1f} ms  all_simple_paths '
+              + (f'{enumerate_time * 1000:9.1f} ms' if enumerate_time is not None else '      n/a'))
+
+
+if __name__ == '__main__':
+    main(*(int(argument) for argument in sys.argv[1:]))
@@ -7,14 +7,16 @@
 
 import os
 import sys
+import json
 import argparse
 import tempfile
 import traceback
+from typing import List, Optional, Tuple
 
 from polywit.exceptions import ValidationError
-from polywit.base import Validator
-from polywit.java import JavaTestHarness, JavaFileProcessor, JavaWitnessProcessor
-from polywit.kotlin import KotlinTestHarness, KotlinWitnessProcessor, KotlinFileProcessor
+from polywit.base.hooks import Phase, SpinnerHook, TimingHook
+from polywit.batch import BatchResult, collect_result, load_manifest, run_batch
+from polywit.server import serve, request_validation
 
 from polywit import __version__
 
@@ -70,6 +72,72 @@ def create_argument_parser() -> argparse.ArgumentParser:
         action='store_true',
         help="Shows the stacktrace of the failed execution"
     )
+    base_subparser.add_argument(
+        '--workspace',
+        choices=['copy', 'link'],
+        default='copy',
+        help="How the benchmark and packages are placed in the test directory. link uses reflinks, "
+             "hardlinks or symlinks where the filesystem supports them and only copies rewritten files"
+    )
+    base_subparser.add_argument(
+        '--cache-dir',
+        default=None,
+        help="Directory of the on-disk cache of parsed source files and witnesses, shared safely between runs"
+    )
+    base_subparser.add_argument(
+        '--cache-size',
+        type=int,
+        default=256,
+        metavar='MIB',
+        help="Size cap of each part of the cache, least recently used entries are evicted beyond it"
+    )
+    base_subparser.add_argument(
+        '--no-spinner',
+        action='store_true',
+        help="Hides the progress spinner, e.g. when running headless"
+    )
+    base_subparser.add_argument(
+        '--compile-time-limit',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help="Wall-clock time limit for compiling the test harness"
+    )
+    base_subparser.add_argument(
+        '--compile-cpu-limit',
+        type=int,
+        default=None,
+        metavar='SECONDS',
+        help="CPU time limit for compiling the test harness"
+    )
+    base_subparser.add_argument(
+        '--compile-memory-limit',
+        type=int,
+        default=None,
+        metavar='MIB',
+        help="Address space limit for compiling the test harness. The JVM reserves more than its heap"
+    )
+    base_subparser.add_argument(
+        '--run-time-limit',
+        type=float,
+        default=None,
+        metavar='SECONDS',
+        help="Wall-clock time limit for running the test harness"
+    )
+    base_subparser.add_argument(
+        '--run-cpu-limit',
+        type=int,
+        default=None,
+        metavar='SECONDS',
+        help="CPU time limit for running the test harness"
+    )
+    base_subparser.add_argument(
+        '--run-memory-limit',
+        type=int,
+        default=None,
+        metavar='MIB',
+        help="Address space limit for running the test harness. The JVM reserves more than its heap"
+    )
 
     java_sub_parser = subparsers.add_parser(
         'java',
@@ -98,7 +166,52 @@ def create_argument_parser() -> argparse.ArgumentParser:
         required=True,
         type=str,
         action="store",
-        help='Path to the witness file. Must conform to the exchange format'
+        help='Path to the witness file. Must conform to the exchange format, and may be gzip, bz2 or xz compressed'
+    )
+
+    java_sub_parser.add_argument(
+        '--parse-jobs',
+        type=int,
+        default=1,
+        help='Number of processes used to parse the Java sources'
+    )
+
+    java_sub_parser.add_argument(
+        '--parse-scope',
+        choices=['all', 'reachable'],
+        default='all',
+        help='Parse every benchmark file, or only the files reachable from Main through imports '
+             'and same package references'
+    )
+
+    java_sub_parser.add_argument(
+        '--prefilter',
+        choices=['off', 'conservative', 'skip'],
+        default='off',
+        help='Avoid fully parsing files that do not mention Verifier or a nondet returning method. '
+             'conservative still reads their imports and gives the same result, skip ignores them'
+    )
+
+    java_sub_parser.add_argument(
+        '--engine',
+        choices=['ast', 'tokens'],
+        default='ast',
+        help='Find nondet calls from the full syntax tree, or from the token stream with a fallback '
+             'to the syntax tree for constructs the tokens do not settle'
+    )
+
+    java_sub_parser.add_argument(
+        '--server',
+        type=str,
+        default=None,
+        help='Path to the socket of a running polywit server to send the validation to'
+    )
+
+    java_sub_parser.add_argument(
+        '--output',
+        choices=['text', 'json'],
+        default='text',
+        help='Output format of the result, json includes the timings of each phase'
     )
 
     kotlin_sub_parser = subparsers.add_parser(
@@ -128,58 +241,227 @@ def create_argument_parser() -> argparse.ArgumentParser:
         required=True,
         type=str,
         action="store",
-        help='Path to the witness file. Must conform to the exchange format'
+        help='Path to the witness file. Must conform to the exchange format, and may be gzip, bz2 or xz compressed'
+    )
+
+    kotlin_sub_parser.add_argument(
+        '--server',
+        type=str,
+        default=None,
+        help='Path to the socket of a running polywit server to send the validation to'
+    )
+
+    kotlin_sub_parser.add_argument(
+        '--output',
+        choices=['text', 'json'],
+        default='text',
+        help='Output format of the result, json includes the timings of each phase'
+    )
+
+    batch_sub_parser = subparsers.add_parser(
+        'batch',
+        help='Validate a manifest of jobs across a pool of workers',
+        parents=[base_subparser]
+    )
+
+    batch_sub_parser.add_argument(
+        'manifest',
+        type=str,
+        help="Path to the manifest file, one JSON job per line"
+    )
+
+    batch_sub_parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help="Number of worker processes, defaults to the number of processors"
+    )
+
+    serve_sub_parser = subparsers.add_parser(
+        'serve',
+        help='Serve validation requests over a Unix domain socket',
+        parents=[base_subparser]
+    )
+
+    serve_sub_parser.add_argument(
+        'socket',
+        type=str,
+        help="Path of the socket to listen on"
     )
 
     return parser
 
 
-def main():
-    parser = create_argument_parser()
-    config = parser.parse_args(sys.argv[1:])
-    config = vars(config)
+def explicit_options(parser: argparse.ArgumentParser, config: dict) -> List[str]:
+    """
+    Finds the options of the chosen frontend that were set rather than left at their default
+    :param parser: The command-line parser
+    :param config: The command-line configuration
+    :return: Names of the options
+    """
+    subparsers = next(action for action in parser._actions if isinstance(action, argparse._SubParsersAction))
+    frontend_parser = subparsers.choices[config['language']]
+    return [key for key, value in config.items() if value != frontend_parser.get_default(key)]
+
+
+def batch(config: dict) -> None:
+    """
+    Validates every job in the manifest and prints each outcome as it finishes
+    :param config: The command-line configuration
+    """
+    jobs = load_manifest(config['manifest'])
+    for job_result in run_batch(jobs, config, config['workers']):
+        if job_result.error is None and job_result.reason is not None:
+            print(f'{job_result.job_id}: {job_result.result} \033[93m({job_result.reason})\033[0m')
+        elif job_result.error is None:
+            print(f'{job_result.job_id}: {job_result.result}')
+        else:
+            print(f'{job_result.job_id}: \033[91m{job_result.error}\033[0m')
+
+
+def create_json_report(config: dict,
+                       job_result: BatchResult,
+                       timing_hook: TimingHook,
+                       assumptions: Optional[List],
+                       error: Optional[ValidationError]) -> dict:
+    """
+    Creates a machine-readable report of a validation
+    :param config: The command-line configuration
+    :param job_result: The outcome of the validation, with what the validator recorded while running it
+    :param timing_hook: The hook that recorded the phase timings
+    :param assumptions: The filtered assumptions, None if they were not extracted
+    :param error: The error that stopped the validation, if any
+    :return: The report as a JSON serialisable dictionary
+    """
+    extract_timing = timing_hook.timings.get(Phase.EXTRACT_ASSUMPTIONS)
+    report = {
+        'version': __version__,
+        'verdict': job_result.result.name if job_result.result is not None else None,
+        'error': error.message if error is not None else None,
+        'reason': job_result.reason,
+        'producer': job_result.producer,
+        'assumptions': {
+            'raw': extract_timing.payload_size if extract_timing is not None else None,
+            'filtered': len(assumptions) if assumptions is not None else None
+        },
+        'phases': {
+            phase.name.lower(): timing._asdict() for phase, timing in timing_hook.timings.items()
+        },
+        'commands': {
+            step: stats._asdict() for step, stats in (job_result.command_stats or {}).items()
+        }
+    }
+    if config['show_assumptions'] and assumptions is not None:
+        report['assumptions']['values'] = [
+            {'position': f'{position[0]}:{position[1]}', 'value': value} for position, value in assumptions
+        ]
+    return report
+
+
+def serve_requests(config: dict) -> None:
+    """
+    Serves validation requests until interrupted, exiting with an error if the socket is taken
+    :param config: The command-line configuration
+    """
+    try:
+        serve(config['socket'], config)
+    except FileExistsError as exc:
+        sys.exit(str(exc))
 
+
+def validate_locally(config: dict,
+                     timing_hook: TimingHook) -> Tuple[BatchResult, Optional[List], Optional[ValidationError]]:
+    """
+    Validates the witness in this process
+    :param config: The command-line configuration
+    :param timing_hook: The hook that records the phase timings
+    :return: The outcome of the validation, the filtered assumptions if they were extracted, and the
+        error that stopped the validation, if any
+    """
+    # Imported here so only the chosen frontend and its parsers are loaded
+    from polywit.frontends import create_validator
+
+    json_output = config['output'] == 'json'
+    hooks = [timing_hook] if json_output or config['no_spinner'] else [SpinnerHook(), timing_hook]
+    # The assumptions table would corrupt the JSON, they are included in the report instead
+    validator_config = config | {'show_assumptions': config['show_assumptions'] and not json_output}
+    validator = None
+    outcome = None
+    assumptions = None
+    error = None
     try:
-        print(f'polywit: v{__version__}')
-        match config['language']:
-            case 'java':
-                file_processor = JavaFileProcessor(
-                    config['directory'],
-                    config['benchmark'],
-                    config['package_paths']
-                )
-                witness_processor = JavaWitnessProcessor(
-                    config['directory'],
-                    config['witness_file']
-                )
-                test_harness = JavaTestHarness(config['directory'])
-                validator = Validator(file_processor, witness_processor, test_harness, config)
-            case 'kotlin':
-                file_processor = KotlinFileProcessor(
-                    config['directory'],
-                    config['benchmark'],
-                    config['package_paths']
-                )
-                witness_processor = KotlinWitnessProcessor(
-                    config['directory'],
-                    config['witness_file']
-                )
-                test_harness = KotlinTestHarness(config['directory'])
-                validator = Validator(file_processor, witness_processor, test_harness, config)
-            case _:
-                raise ValueError("Validator not yet supported")
+        validator = create_validator(validator_config, hooks)
         validator.preprocess()
         assumptions = validator.extract_assumptions()
         outcome = validator.execute_test_harness(assumptions)
-        print(f'{outcome}')
+    except ValidationError as err:
+        error = err
+    if validator is None:
+        return BatchResult(config['witness_file'], None, None), assumptions, error
+    return collect_result(config['witness_file'], validator, outcome), assumptions, error
+
 
+def validate_remotely(config: dict,
+                      options: List[str]) -> Tuple[BatchResult, Optional[List], Optional[ValidationError]]:
+    """
+    Sends the validation to a running server
+    :param config: The command-line configuration
+    :param options: Names of the options set on the command line
+    :return: The outcome of the validation, no assumptions as they stay on the server, and the error
+        that stopped the validation, if any
+    """
+    try:
+        return request_validation(config['server'], config, options), None, None
     except ValidationError as err:
-        validator.spinner.fail()
-        if not config['stacktrace']:
-            print(f'\033[91m{err.message}\033[0m')
-            print(f'\033[91m{err.retry_message}\033[0m')
-        else:
-            traceback.print_exc()
+        return BatchResult(config['witness_file'], None, None), None, err
+
+
+def report(config: dict,
+           job_result: BatchResult,
+           timing_hook: TimingHook,
+           assumptions: Optional[List],
+           error: Optional[ValidationError]) -> None:
+    """
+    Prints the outcome of a validation as text or as a JSON report
+    :param config: The command-line configuration
+    :param job_result: The outcome of the validation
+    :param timing_hook: The hook that recorded the phase timings
+    :param assumptions: The filtered assumptions, None if they were not extracted
+    :param error: The error that stopped the validation, if any
+    """
+    if error is not None and config['stacktrace']:
+        traceback.print_exception(error)
+    if config['output'] == 'json':
+        print(json.dumps(create_json_report(config, job_result, timing_hook, assumptions, error)))
+    elif error is None:
+        print(f'{job_result.result}')
+        if job_result.reason is not None:
+            print(f'\033[93m{job_result.reason}\033[0m')
+    elif not config['stacktrace']:
+        print(f'\033[91m{error.message}\033[0m')
+        print(f'\033[91m{error.retry_message}\033[0m')
+
+
+def main():
+    parser = create_argument_parser()
+    config = parser.parse_args(sys.argv[1:])
+    config = vars(config)
+
+    if config.get('output') != 'json':
+        print(f'polywit: v{__version__}')
+    if config['language'] == 'batch':
+        batch(config)
+        sys.exit()
+    if config['language'] == 'serve':
+        serve_requests(config)
+        sys.exit()
+
+    timing_hook = TimingHook()
+    if config['server'] is not None:
+        job_result, assumptions, error = validate_remotely(config, explicit_options(parser, config))
+    else:
+        job_result, assumptions, error = validate_locally(config, timing_hook)
+    report(config, job_result, timing_hook, assumptions, error)
     sys.exit()
 
 
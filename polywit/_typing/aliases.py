@@ -1,4 +1,4 @@
-from typing import TypeAlias, Tuple
+from typing import TypeAlias, Tuple, Optional
 
-Position: TypeAlias = Tuple[str, str]
-Assumption: TypeAlias = Tuple[Position, str]
+Position: TypeAlias = Tuple[str, int]
+Assumption: TypeAlias = Tuple[Position, Optional[str]]
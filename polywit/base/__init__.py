@@ -1,11 +1,30 @@
-from polywit.base.file_processors import FileProcessor, WitnessProcessor
-from polywit.base.test_harness import TestHarness, PolywitTestResult
-from polywit.base.validator import Validator
+import importlib
+
+# The base classes are loaded on first access so that importing a light module such as
+# polywit.base.test_harness does not pull in networkx, halo and tabulate
+_LAZY_EXPORTS = {
+    'FileProcessor': 'polywit.base.file_processors',
+    'WitnessProcessor': 'polywit.base.file_processors',
+    'YamlWitnessProcessor': 'polywit.base.file_processors',
+    'TestHarness': 'polywit.base.test_harness',
+    'PolywitTestResult': 'polywit.base.test_harness',
+    'ResourceLimits': 'polywit.base.test_harness',
+    'Validator': 'polywit.base.validator'
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_EXPORTS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    return getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+
 
 __all__ = [
     'FileProcessor',
     'WitnessProcessor',
+    'YamlWitnessProcessor',
     'TestHarness',
     'PolywitTestResult',
+    'ResourceLimits',
     'Validator'
 ]
@@ -6,12 +6,17 @@
 """
 
 from abc import ABC, abstractmethod
+import marshal
 import os
-from typing import List, Optional
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-import networkx as nx
+from polywit._typing import Position
+from polywit.utils import replace_file, read_witness_graph, open_witness, file_hash, AssumptionParser, \
+    AssumptionStore, ContentCache, WitnessGraph, WitnessEdge
 
-from polywit._typing import Position, Assumption
+# A constraint equating a variable with a value, rewritten into the assignment form of GraphML assumptions
+CONSTRAINT_EQUALITY = re.compile(r'^\s*([^"\s]+)\s*==\s*(.*)$')
 
 
 class Processor(ABC):
@@ -41,6 +46,8 @@ class Processor(ABC):
         if not os.path.exists(subdir):
             os.makedirs(subdir)
         new_path = os.path.join(self.test_directory, path)
+        # The file may be linked to the benchmark, so replace it rather than writing through the link
+        replace_file(new_path)
         with open(new_path, 'w', encoding='utf-8') as file:
             file.write(data)
 
@@ -52,8 +59,14 @@ class FileProcessor(Processor):
     An abstract class representing the base functionality for a file processor
     """
 
-    def __init__(self, test_directory):
+    # Namespace of the processor's records in the source cache, None if it does not use the cache
+    CACHE_NAMESPACE: Optional[str] = None
+
+    def __init__(self, test_directory, workspace_mode='copy', cache: Optional[ContentCache] = None):
         super().__init__(test_directory)
+        self.workspace_mode = workspace_mode
+        self.cache = cache
+        self.source_files = []
 
     @abstractmethod
     def extract_position_type_map(self) -> dict[Position, str]:
@@ -67,51 +80,117 @@ class WitnessProcessor(Processor):
     A class representing the witness processor
     """
 
-    def __init__(self, test_directory, witness_path):
+    # Namespace of the processor's records in the witness cache, None if it does not use the cache
+    CACHE_NAMESPACE: Optional[str] = None
+
+    def __init__(self, test_directory, witness_path, cache: Optional[ContentCache] = None):
         super().__init__(test_directory)
         self.producer = None
         self.witness_path = witness_path
         self.witness = None
+        self.entry_node = None
+        self.violation_node = None
+        self.violation_path: List[WitnessEdge] = []
+        self.cache = cache
+        self._assumptions: Optional[AssumptionStore] = None
 
     def preprocess(self) -> None:
+        if self._load_cached_witness():
+            return
         if self.witness is None:
             try:
-                self.witness = nx.read_graphml(self.witness_path)
+                self.witness = self._read_witness()
             except Exception as exc:
                 raise ValueError(f'Witness file is not formatted correctly. \n {exc}') from exc
         # Check witness is linear
         self._check_witness_linearity()
 
+    def _read_witness(self) -> WitnessGraph:
+        """
+        Reads the witness graph from the witness file
+        """
+        with open_witness(self.witness_path) as file:
+            return read_witness_graph(file)
+
+    def _cache_key(self) -> str:
+        return file_hash(self.witness_path)
+
+    def _load_cached_witness(self) -> bool:
+        """
+        Restores the checked entry and violation nodes, the producer and the assumptions of a witness
+        with the same content from the cache
+
+        :return: Whether the witness was found in the cache
+        """
+        if self.cache is None:
+            return False
+        record = self.cache.get(self._cache_key())
+        if record is None:
+            return False
+        try:
+            self.entry_node, self.violation_node, self.producer, assumptions = marshal.loads(record)
+        except (EOFError, ValueError, TypeError):
+            # A damaged record is treated as a miss and overwritten once the witness has been read
+            return False
+        self._assumptions = AssumptionStore.from_record(assumptions)
+        return True
+
+    def _store_cached_witness(self) -> None:
+        if self.cache is None:
+            return
+        record = (self.entry_node, self.violation_node, self.producer, self._assumptions.to_record())
+        self.cache.put(self._cache_key(), marshal.dumps(record))
+        self.cache.evict()
+
     def _check_witness_linearity(self) -> None:
         """
-        Checks the witness is a linear violation witness before building validator
+        Checks the witness is a linear violation witness before building validator, keeping the edges
+        of its path from the entry node to the violation node
         """
-        entry_nodes = list(filter(
-            lambda nodes: nodes[1],
-            self.witness.nodes.data('isEntryNode', default=False)
-        ))
+        entry_nodes = self.witness.entry_nodes
         if len(entry_nodes) != 1:
             raise ValueError('Witness does not have a single entry node')
-        self.entry_node = entry_nodes[0][0]
-        violation_nodes = list(filter(
-            lambda nodes: nodes[1],
-            self.witness.nodes.data('isViolationNode', default=False)
-        ))
+        self.entry_node = entry_nodes[0]
+        violation_nodes = self.witness.violation_nodes
         if len(violation_nodes) == 0:
             raise ValueError('No support for non violation-witnesses')
         elif len(violation_nodes) > 1:
             raise ValueError('Witness does not have a single violation node')
-        self.violation_node = violation_nodes[0][0]
-        if len(list(nx.all_simple_paths(self.witness, source=self.entry_node, target=self.violation_node))) > 1:
-            raise ValueError('Witness has multiple execution paths from source to sink')
+        self.violation_node = violation_nodes[0]
+        self.violation_path = self.witness.violation_path(self.entry_node, self.violation_node)
+
+    def _violation_path_data(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over the kept attributes of the edges of the violation path in execution order
+        """
+        return (edge.data for edge in self.violation_path)
+
+    @property
+    def witness_size(self) -> int:
+        """
+        Size of the witness file in bytes
+        """
+        return os.path.getsize(self.witness_path)
 
     def _get_value_from_witness(self, key) -> Optional[str]:
         return self.witness.graph[key] if key in self.witness.graph else None
 
+    def extract_assumptions(self) -> AssumptionStore:
+        """
+        Extracts the assumptions from the witness, or returns them from the cache if the witness has
+        been seen before
+
+        :return: The assumptions in execution order
+        """
+        if self._assumptions is None:
+            self._assumptions = self._extract_assumptions()
+            self._store_cached_witness()
+        return self._assumptions
+
     @abstractmethod
-    def extract_assumptions(self) -> List[Assumption]:
+    def _extract_assumptions(self) -> AssumptionStore:
         """
-        Extracts the assumptions from the witness
+        Extracts the assumptions from the witness graph
         """
 
     @staticmethod
@@ -123,3 +202,82 @@ class WitnessProcessor(Processor):
         """
         base_name = os.path.basename(path)
         return os.path.splitext(base_name)[0]
+
+
+class YamlWitnessProcessor(WitnessProcessor):
+    """
+    A class representing the processor of YAML witnesses (format 2.0). The waypoints are streamed
+    straight into assumptions, and no witness graph is built
+    """
+
+    # Waypoint types whose constraint gives the value of a nondet call
+    ASSUMPTION_WAYPOINT_TYPES = ('assumption', 'function_return')
+
+    def __init__(self, test_directory, witness_path, cache: Optional[ContentCache] = None):
+        super().__init__(test_directory, witness_path, cache)
+        # Position and assignment form of the constraint of each followed assumption waypoint
+        self.waypoints: List[Tuple[Position, str]] = []
+
+    def preprocess(self) -> None:
+        if self._load_cached_witness():
+            return
+        # Imported here as PyYAML is only needed for YAML witnesses
+        try:
+            from polywit.utils.yaml_utils import YamlWitnessReader
+        except ImportError as exc:
+            raise ValueError('Reading YAML witnesses requires PyYAML to be installed') from exc
+
+        with open_witness(self.witness_path) as file:
+            reader = YamlWitnessReader(file)
+            self._read_waypoints(reader)
+        violation_entries = [metadata for entry_type, metadata in reader.entries if entry_type == 'violation_sequence']
+        if len(violation_entries) == 0:
+            raise ValueError('No support for non violation-witnesses')
+        elif len(violation_entries) > 1:
+            raise ValueError('Witness does not have a single violation sequence')
+        metadata = violation_entries[0]
+        format_version = str(metadata.get('format_version', ''))
+        if not format_version.startswith('2.'):
+            raise ValueError(f'Unsupported YAML witness format version {format_version}')
+        self.producer = (metadata.get('producer') or {}).get('name')
+
+    def _read_waypoints(self, reader) -> None:
+        """
+        Collects the followed assumption waypoints, checking the violation sequence is a single path that
+        ends at its target
+        """
+        followed_segments = set()
+        target_segment = None
+        for waypoint in reader.waypoints():
+            if waypoint.action == 'avoid':
+                continue
+            if waypoint.action != 'follow':
+                raise ValueError('Witness has multiple execution paths from source to sink')
+            if waypoint.segment in followed_segments:
+                raise ValueError(f'Witness segment {waypoint.segment} has more than one followed waypoint')
+            followed_segments.add(waypoint.segment)
+            if target_segment is not None:
+                raise ValueError('Witness continues past its target waypoint')
+            if waypoint.type == 'target':
+                target_segment = waypoint.segment
+            elif (waypoint.type in self.ASSUMPTION_WAYPOINT_TYPES and waypoint.constraint is not None
+                  and waypoint.file_name is not None and waypoint.line is not None):
+                self.waypoints.append((
+                    (self._get_file_name_from_path(waypoint.file_name), waypoint.line),
+                    CONSTRAINT_EQUALITY.sub(r'\1 = \2', waypoint.constraint, count=1)
+                ))
+        if target_segment is None:
+            raise ValueError('Witness does not have a target waypoint')
+
+    @abstractmethod
+    def _assumption_parser(self) -> AssumptionParser:
+        """
+        Gives the parser of the assumptions in the producer's dialect
+        """
+
+    def _extract_assumptions(self) -> AssumptionStore:
+        values = self._assumption_parser().parse_all(assumption for _, assumption in self.waypoints)
+        assumptions = AssumptionStore()
+        for (position, _), value in zip(self.waypoints, values):
+            assumptions.append(position, value)
+        return assumptions
@@ -0,0 +1,110 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ This module deals with observing the phases of a validation
+"""
+
+from enum import Enum
+from typing import Dict, NamedTuple, Optional
+
+
+class Phase(Enum):
+    PREPROCESS_BENCHMARK = 'Preprocessing benchmark files'
+    PREPROCESS_WITNESS = 'Preprocessing witness file'
+    EXTRACT_POS_TYPE_MAP = 'Extracting position type map from benchmarks'
+    EXTRACT_ASSUMPTIONS = 'Extracting assumptions from witness'
+    BUILD_TEST_HARNESS = 'Building test harness'
+    RUN_TEST_HARNESS = 'Executing test harness'
+
+
+class PhaseEvent(NamedTuple):
+    """
+    An event emitted at the start, end or failure of a validation phase
+
+    phase: The phase the event belongs to
+    timestamp: Monotonic time of the event in seconds, as given by time.perf_counter
+    payload_size: Size of the phase output, e.g. files found, assumptions extracted or bytes of
+        harness output. Only set on end events
+    error: The exception that stopped the phase. Only set on failure events
+    cpu_time: CPU time of the polywit process at the event in seconds, as given by time.process_time.
+        None if the emitter does not measure it
+    """
+    phase: Phase
+    timestamp: float
+    payload_size: Optional[int] = None
+    error: Optional[BaseException] = None
+    cpu_time: Optional[float] = None
+
+
+class ValidatorHook:
+    """
+    Base class for observers of the validation phases. Subclasses override the events they need
+    """
+
+    def on_phase_start(self, event: PhaseEvent) -> None:
+        """
+        Called before a phase starts
+        """
+
+    def on_phase_end(self, event: PhaseEvent) -> None:
+        """
+        Called after a phase completes successfully
+        """
+
+    def on_phase_error(self, event: PhaseEvent) -> None:
+        """
+        Called when a phase raises an exception
+        """
+
+
+class SpinnerHook(ValidatorHook):
+    """
+    Shows a terminal spinner for each phase
+    """
+
+    def __init__(self):
+        # Imported here so headless runs without a spinner never load it
+        from halo import Halo
+
+        self.spinner = Halo(text='', spinner='dots')
+
+    def on_phase_start(self, event: PhaseEvent) -> None:
+        self.spinner.start(event.phase.value)
+
+    def on_phase_end(self, event: PhaseEvent) -> None:
+        self.spinner.succeed()
+
+    def on_phase_error(self, event: PhaseEvent) -> None:
+        self.spinner.fail()
+
+
+class PhaseTiming(NamedTuple):
+    """
+    The time spent in a completed phase
+    """
+    wall_time: float
+    cpu_time: Optional[float]
+    payload_size: Optional[int]
+
+
+class TimingHook(ValidatorHook):
+    """
+    Records the wall and CPU time of each completed phase
+    """
+
+    def __init__(self):
+        self._start_events: Dict[Phase, PhaseEvent] = {}
+        self.timings: Dict[Phase, PhaseTiming] = {}
+
+    def on_phase_start(self, event: PhaseEvent) -> None:
+        self._start_events[event.phase] = event
+
+    def on_phase_end(self, event: PhaseEvent) -> None:
+        start_event = self._start_events.pop(event.phase)
+        self.timings[event.phase] = PhaseTiming(
+            event.timestamp - start_event.timestamp,
+            event.cpu_time - start_event.cpu_time
+            if event.cpu_time is not None and start_event.cpu_time is not None else None,
+            event.payload_size
+        )
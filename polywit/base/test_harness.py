@@ -6,12 +6,16 @@
 """
 
 import os
+import resource
+import selectors
+import signal
 import subprocess
+import time
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import List, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-from polywit._typing import Assumption
+from polywit.utils import replace_file, AssumptionStore
 
 
 class PolywitTestResult(Enum):
@@ -36,20 +40,65 @@ class PolywitTestResult(Enum):
         return self._colour_
 
 
+class ResourceLimits(NamedTuple):
+    """
+    The limits put on a command run by the test harness, None means unlimited
+
+    time_limit: Wall-clock time in seconds
+    cpu_limit: CPU time in seconds
+    memory_limit: Address space in bytes
+    """
+    time_limit: Optional[float] = None
+    cpu_limit: Optional[int] = None
+    memory_limit: Optional[int] = None
+
+
+class CommandStats(NamedTuple):
+    """
+    The resources used by a command run by the test harness
+
+    wall_time: Wall-clock time in seconds
+    cpu_time: User and system CPU time of the command in seconds
+    max_rss: Peak resident set size of the command in bytes
+    limit_exceeded: Description of the limit the command hit, if any
+    """
+    wall_time: float
+    cpu_time: float
+    max_rss: int
+    limit_exceeded: Optional[str] = None
+
+
 class TestHarness(ABC):
     """
     The class TestHarness gives base functionality and definitions for
     all the tests creation and compilation of the test harness
     """
+    # Only the last bytes of each output stream are kept in memory
+    OUTPUT_BUFFER_SIZE = 1 << 20
+    READ_CHUNK_SIZE = 1 << 16
+    # Output fragments showing a command ran out of memory
+    MEMORY_ERROR_MARKERS = (
+        'java.lang.OutOfMemoryError',
+        'Could not reserve enough space',
+        'insufficient memory for the Java Runtime Environment'
+    )
 
-    def __init__(self, directory):
+    def __init__(self, directory, limits: Optional[Dict[str, ResourceLimits]] = None):
         """
         The constructor of TestHarness collects information on the
         output directory
 
         :param directory: Directory that the harness will write to
+        :param limits: Resource limits of each step, e.g. compile and run
         """
         self.directory = directory
+        self.limits = limits if limits is not None else {}
+        # Bytes of output produced by the last command run
+        self.output_size = 0
+        # Resources used by each step, e.g. compile and run
+        self.command_stats: Dict[str, CommandStats] = {}
+        # Description of the first limit hit by a step, the result is unknown if set
+        self.limit_exceeded: Optional[str] = None
 
     @property
     @abstractmethod
@@ -88,26 +137,161 @@ class TestHarness(ABC):
         subdir = os.path.dirname(path)
         if not os.path.exists(subdir):
             os.makedirs(subdir)
+        # The file may be linked to the benchmark, so replace it rather than writing through the link
+        replace_file(path)
         with open(path, 'wt', encoding='utf-8') as file:
             file.writelines(data)
 
-    @staticmethod
-    def _run_command(command: List[str]) -> Tuple[str, str]:
+    def _run_command(self,
+                     command: List[str],
+                     step: Optional[str] = None,
+                     stop_markers: Iterable[str] = ()) -> Tuple[str, str]:
         """
-        Handles running commands in subprocess
+        Handles running commands in subprocess. The output is read as it is produced and only the
+        last OUTPUT_BUFFER_SIZE bytes of each stream are kept
 
         :param command: List of separated command to run
+        :param step: Name under which the command is limited and its resources are recorded
+        :param stop_markers: Output fragments that decide the result, the command is terminated
+            as soon as one of them is seen
         :return: stdout and stderr from command
         """
-        with subprocess.Popen(command,
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE) as proc:
-            proc.wait()
-            out = proc.stdout.read().decode("utf-8")
-            err = proc.stderr.read().decode("utf-8")
+        limits = self.limits.get(step, ResourceLimits())
+        start_time = time.perf_counter()
+        deadline = time.monotonic() + limits.time_limit if limits.time_limit is not None else None
+        # Start a new session so the whole process group can be stopped, e.g. the JVM started by kotlinc
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              start_new_session=True,
+                              preexec_fn=self._limit_preexec_fn(limits)) as proc:
+            out, err, timed_out = self._capture_output(
+                proc,
+                [marker.encode('utf-8') for marker in stop_markers],
+                deadline
+            )
+            usage, reap_timed_out = self._reap(proc, None if timed_out else deadline)
+            timed_out = timed_out or reap_timed_out
+        wall_time = time.perf_counter() - start_time
+        out = out.decode("utf-8", errors="replace")
+        err = err.decode("utf-8", errors="replace")
+        cpu_time = usage.ru_utime + usage.ru_stime
+
+        limit_exceeded = None
+        if timed_out:
+            limit_exceeded = f'{step} exceeded the wall-clock limit of {limits.time_limit}s'
+        elif limits.cpu_limit is not None and (cpu_time >= limits.cpu_limit
+                                               or proc.returncode == -signal.SIGXCPU):
+            limit_exceeded = f'{step} exceeded the CPU time limit of {limits.cpu_limit}s'
+        elif limits.memory_limit is not None and any(marker in out or marker in err
+                                                     for marker in self.MEMORY_ERROR_MARKERS):
+            limit_exceeded = f'{step} exceeded the memory limit of {limits.memory_limit} bytes'
+        if limit_exceeded is not None and self.limit_exceeded is None:
+            self.limit_exceeded = limit_exceeded
+        if step is not None:
+            # ru_maxrss is reported in kilobytes on Linux
+            self.command_stats[step] = CommandStats(wall_time, cpu_time, usage.ru_maxrss * 1024, limit_exceeded)
         return out, err
 
+    @staticmethod
+    def _limit_preexec_fn(limits: ResourceLimits):
+        """
+        Creates the function that applies the CPU and memory limits in the child process
+
+        :param limits: The limits of the command
+        :return: The function to run in the child before the command, or None if there are no limits
+        """
+        if limits.cpu_limit is None and limits.memory_limit is None:
+            return None
+
+        def set_limits():
+            if limits.cpu_limit is not None:
+                # The soft limit sends SIGXCPU, the hard limit a second later kills the process
+                resource.setrlimit(resource.RLIMIT_CPU, (limits.cpu_limit, limits.cpu_limit + 1))
+            if limits.memory_limit is not None:
+                resource.setrlimit(resource.RLIMIT_AS, (limits.memory_limit, limits.memory_limit))
+
+        return set_limits
+
+    def _capture_output(self,
+                        proc: subprocess.Popen,
+                        stop_markers: List[bytes],
+                        deadline: Optional[float] = None) -> Tuple[bytes, bytes, bool]:
+        """
+        Reads stdout and stderr of a running process until both are closed, terminating the process
+        once a stop marker is seen or the deadline has passed
+
+        :param proc: The running process
+        :param stop_markers: Output fragments that cause the process to be terminated
+        :param deadline: Time, as given by time.monotonic, after which the process is terminated
+        :return: The tail of stdout and stderr and whether the deadline was hit
+        """
+        buffers = {proc.stdout: bytearray(), proc.stderr: bytearray()}
+        self.output_size = 0
+        stopped = False
+        timed_out = False
+        with selectors.DefaultSelector() as selector:
+            for stream in buffers:
+                selector.register(stream, selectors.EVENT_READ)
+            while selector.get_map():
+                timeout = None
+                if deadline is not None and not stopped:
+                    timeout = max(deadline - time.monotonic(), 0)
+                events = selector.select(timeout)
+                if not events and not stopped:
+                    self._terminate(proc)
+                    stopped = timed_out = True
+                for key, _ in events:
+                    chunk = os.read(key.fd, self.READ_CHUNK_SIZE)
+                    if not chunk:
+                        selector.unregister(key.fileobj)
+                        continue
+                    self.output_size += len(chunk)
+                    buffer = buffers[key.fileobj]
+                    buffer += chunk
+                    # Only search the new bytes, plus enough of the old to catch a marker split across reads
+                    if not stopped and any(marker in buffer[-(len(chunk) + len(marker) - 1):]
+                                           for marker in stop_markers):
+                        self._terminate(proc)
+                        stopped = True
+                    if len(buffer) > self.OUTPUT_BUFFER_SIZE:
+                        del buffer[:len(buffer) - self.OUTPUT_BUFFER_SIZE]
+        return bytes(buffers[proc.stdout]), bytes(buffers[proc.stderr]), timed_out
+
+    def _reap(self, proc: subprocess.Popen, deadline: Optional[float]) -> Tuple[resource.struct_rusage, bool]:
+        """
+        Waits for a process to exit, terminating it once the deadline has passed. The process is
+        reaped here rather than by Popen so that its resource usage can be collected
+
+        :param proc: The process to wait for
+        :param deadline: Time, as given by time.monotonic, after which the process is terminated
+        :return: The resource usage of the process and whether the deadline was hit
+        """
+        timed_out = False
+        while True:
+            pid, status, usage = os.wait4(proc.pid, os.WNOHANG if deadline is not None else 0)
+            if pid != 0:
+                proc.returncode = os.waitstatus_to_exitcode(status)
+                return usage, timed_out
+            if time.monotonic() >= deadline:
+                self._terminate(proc)
+                deadline = None
+                timed_out = True
+            else:
+                time.sleep(0.01)
+
+    @staticmethod
+    def _terminate(proc: subprocess.Popen) -> None:
+        """
+        Kills the process group of a process. Output already written stays readable from the pipes
+
+        :param proc: The process to kill
+        """
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
     @abstractmethod
-    def build_test_harness(self, assumptions: List[Assumption]) -> None:
+    def build_test_harness(self, assumptions: AssumptionStore) -> None:
         """
         Constructs and compiles the test harness
         """
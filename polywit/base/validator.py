@@ -4,17 +4,18 @@
 
  This module deals with the base building of the test harness
 """
+import time
 from textwrap import indent
-from typing import List
-
-from tabulate import tabulate
-from halo import Halo
+from typing import Callable, Iterable, Optional, TypeVar
 
 from polywit.base import WitnessProcessor, FileProcessor
-from polywit._typing import Assumption, Position
-from polywit.utils import filter_assumptions
+from polywit.base.hooks import Phase, PhaseEvent, ValidatorHook, SpinnerHook
+from polywit._typing import Position
+from polywit.utils import filter_assumptions, AssumptionStore
 from polywit.base import TestHarness, PolywitTestResult
 
+T = TypeVar('T')
+
 
 class Validator:
     """
@@ -22,23 +23,25 @@ class Validator:
     constructing, executing the test harness and reporting the result
     """
 
-    PREPROCESS_BENCHMARK_MESSAGE = 'Preprocessing benchmark files'
-    PREPROCESS_WITNESS_MESSAGE = 'Preprocessing witness file'
-    EXTRACT_POS_TYPE_MAP_MESSAGE = 'Extracting position type map from benchmarks'
-    EXTRACT_ASSUMPTIONS_MESSAGE = 'Extracting assumptions from witness'
-    BUILD_TEST_HARNESS_MESSAGE = 'Building test harness'
-    RUN_TEST_HARNESS_MESSAGE = 'Executing test harness'
+    PREPROCESS_BENCHMARK_MESSAGE = Phase.PREPROCESS_BENCHMARK.value
+    PREPROCESS_WITNESS_MESSAGE = Phase.PREPROCESS_WITNESS.value
+    EXTRACT_POS_TYPE_MAP_MESSAGE = Phase.EXTRACT_POS_TYPE_MAP.value
+    EXTRACT_ASSUMPTIONS_MESSAGE = Phase.EXTRACT_ASSUMPTIONS.value
+    BUILD_TEST_HARNESS_MESSAGE = Phase.BUILD_TEST_HARNESS.value
+    RUN_TEST_HARNESS_MESSAGE = Phase.RUN_TEST_HARNESS.value
 
-    def __init__(self, _file_processor, _witness_processor, _test_harness, config):
+    def __init__(self, _file_processor, _witness_processor, _test_harness, config,
+                 hooks: Optional[Iterable[ValidatorHook]] = None):
         """
         The constructor of Validator collects information of output directory is specified
         :param directory: Directory that the test harness will be written to.
+        :param hooks: Observers of the validation phases, defaults to a terminal spinner
         """
         self._file_processor = _file_processor
         self._witness_processor = _witness_processor
         self._test_harness = _test_harness
         self.config = config
-        self.spinner = Halo(text='', spinner='dots')
+        self.hooks = [SpinnerHook()] if hooks is None else list(hooks)
 
     @property
     def file_processor(self) -> FileProcessor:
@@ -52,68 +55,108 @@ class Validator:
     def test_harness(self) -> TestHarness:
         return self._test_harness
 
-    def preprocess(self) -> None:
+    def add_hook(self, hook: ValidatorHook) -> None:
         """
-        Run the preprocessing steps for the processors
+        Subscribes an observer to the validation phases
+
+        :param hook: The observer to add
         """
-        self.spinner.start(self.PREPROCESS_BENCHMARK_MESSAGE)
-        self.file_processor.preprocess()
-        self.spinner.succeed()
+        self.hooks.append(hook)
 
-        self.spinner.start(self.PREPROCESS_WITNESS_MESSAGE)
-        self.witness_processor.preprocess()
-        self.spinner.succeed()
+    def _run_phase(self, phase: Phase, action: Callable[[], T],
+                   payload_size: Callable[[T], Optional[int]]) -> T:
+        """
+        Runs a single phase, notifying the hooks when it starts, ends or fails
 
-    def extract_assumptions(self) -> List[Assumption]:
+        :param phase: The phase being run
+        :param action: The work of the phase
+        :param payload_size: Computes the payload size reported to the hooks from the phase result
+        :return: The result of the phase
         """
-        Extracts the assumptions from the witness file
+        start_event = PhaseEvent(phase, time.perf_counter(), cpu_time=time.process_time())
+        for hook in self.hooks:
+            hook.on_phase_start(start_event)
+        try:
+            result = action()
+        except Exception as exc:
+            error_event = PhaseEvent(phase, time.perf_counter(), error=exc, cpu_time=time.process_time())
+            for hook in self.hooks:
+                hook.on_phase_error(error_event)
+            raise
+        end_event = PhaseEvent(phase, time.perf_counter(), payload_size(result), cpu_time=time.process_time())
+        for hook in self.hooks:
+            hook.on_phase_end(end_event)
+        return result
 
-        :return: List of assumptions
+    def preprocess(self) -> None:
         """
-        self.spinner.start(self.EXTRACT_POS_TYPE_MAP_MESSAGE)
-        position_type_map = self.file_processor.extract_position_type_map()
-        self.spinner.succeed()
+        Run the preprocessing steps for the processors
+        """
+        self._run_phase(
+            Phase.PREPROCESS_BENCHMARK,
+            self.file_processor.preprocess,
+            lambda _: len(self.file_processor.source_files)
+        )
+        self._run_phase(
+            Phase.PREPROCESS_WITNESS,
+            self.witness_processor.preprocess,
+            lambda _: self.witness_processor.witness_size
+        )
+
+    def extract_assumptions(self) -> AssumptionStore:
+        """
+        Extracts the assumptions from the witness file
 
-        self.spinner.start(self.EXTRACT_ASSUMPTIONS_MESSAGE)
-        assumptions = self.witness_processor.extract_assumptions()
-        self.spinner.succeed()
+        :return: The assumptions that come from nondet calls
+        """
+        position_type_map = self._run_phase(
+            Phase.EXTRACT_POS_TYPE_MAP,
+            self.file_processor.extract_position_type_map,
+            len
+        )
+        assumptions = self._run_phase(
+            Phase.EXTRACT_ASSUMPTIONS,
+            self.witness_processor.extract_assumptions,
+            len
+        )
 
         assumptions = filter_assumptions(position_type_map, assumptions)
         if self.config['show_assumptions']:
             self._print_assumptions(assumptions, position_type_map)
         return assumptions
 
-    def execute_test_harness(self, assumptions: List[Assumption]) -> PolywitTestResult:
+    def execute_test_harness(self, assumptions: AssumptionStore) -> PolywitTestResult:
         """
         Builds and executes a test harness using the extracted assumptions
 
-        :param assumptions: List of extracted assumptions from witness
+        :param assumptions: The extracted assumptions from the witness
         :return: The validation result from the executed test harness
         """
-        self.spinner.start(self.BUILD_TEST_HARNESS_MESSAGE)
-        self.test_harness.build_test_harness(assumptions)
-        self.spinner.succeed()
-
-        self.spinner.start(self.RUN_TEST_HARNESS_MESSAGE)
-        result = self.test_harness.run_test_harness()
-        self.spinner.succeed()
-        return result
+        self._run_phase(
+            Phase.BUILD_TEST_HARNESS,
+            lambda: self.test_harness.build_test_harness(assumptions),
+            lambda _: self.test_harness.output_size
+        )
+        return self._run_phase(
+            Phase.RUN_TEST_HARNESS,
+            self.test_harness.run_test_harness,
+            lambda _: self.test_harness.output_size
+        )
 
     @staticmethod
-    def _print_assumptions(assumptions: List[Assumption], position_type_map: dict[Position, str]) -> None:
+    def _print_assumptions(assumptions: AssumptionStore, position_type_map: dict[Position, str]) -> None:
         """
         Outputs a table of assumptions and their associated types
 
-        :param assumptions: List of extracted assumptions from witness
+        :param assumptions: The extracted assumptions from the witness
         :param position_type_map: Position type map from the benchmark files
         """
+        # Only needed for --show-assumptions so avoid loading it otherwise
+        from tabulate import tabulate
+
         headers = ['Position', 'Value', 'Type']
         table_data = []
-        for assumption in assumptions:
-            position = assumption[0]
-            formatted_position = f'{position[0]}:{position[1]}'
-            value = assumption[1]
-            value_type = position_type_map[position]
-            table_data.append((formatted_position, value, value_type))
+        for file_name, line, value in assumptions.rows():
+            table_data.append((f'{file_name}:{line}', value, position_type_map[(file_name, line)]))
         # Create table and indent by 2 spaces to look nice
         print(indent(tabulate(table_data, headers=headers, tablefmt="pretty"), '  '))
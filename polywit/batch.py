@@ -0,0 +1,133 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ This module deals with validating many benchmark and witness pairs across a pool of workers
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from polywit.exceptions import ValidationError
+from polywit.base import PolywitTestResult, Validator
+from polywit.base.test_harness import CommandStats
+from polywit.frontends import FRONTENDS, create_validator
+
+MANIFEST_REQUIRED_KEYS = ('language', 'benchmark', 'witness_file')
+MANIFEST_PATH_KEYS = ('benchmark', 'witness_file')
+
+
+class BatchResult(NamedTuple):
+    """
+    The outcome of a single job in a batch, with the reason the result is unknown, the witness
+    producer and the resources used by each test harness step where the job got that far
+    """
+    job_id: str
+    result: Optional[PolywitTestResult]
+    error: Optional[str]
+    reason: Optional[str] = None
+    producer: Optional[str] = None
+    command_stats: Optional[Dict[str, CommandStats]] = None
+
+
+def load_manifest(manifest_path: str) -> List[dict]:
+    """
+    Reads a manifest of jobs, one JSON object per line. Each job takes the same keys as the
+    command-line configuration (language, benchmark, package_paths, witness_file) and an
+    optional id. Relative paths are resolved against the directory of the manifest.
+
+    :param manifest_path: Path to the manifest file
+    :return: List of job configurations
+    """
+    base_directory = os.path.dirname(os.path.abspath(manifest_path))
+    jobs = []
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f'Manifest line {line_number} is not valid JSON. \n {exc}') from exc
+            missing_keys = [key for key in MANIFEST_REQUIRED_KEYS if key not in job]
+            if missing_keys:
+                raise ValueError(f'Manifest line {line_number} is missing {", ".join(missing_keys)}.')
+            if job['language'] not in FRONTENDS:
+                raise ValueError(f'Manifest line {line_number} has unsupported language {job["language"]}.')
+            for key in MANIFEST_PATH_KEYS:
+                job[key] = os.path.join(base_directory, job[key])
+            job['package_paths'] = [
+                os.path.join(base_directory, package) for package in job.get('package_paths', [])
+            ]
+            job.setdefault('id', str(len(jobs)))
+            jobs.append(job)
+    return jobs
+
+
+def collect_result(job_id: str, validator: Validator, outcome: Optional[PolywitTestResult]) -> BatchResult:
+    """
+    Collects the outcome of a job along with what the validator recorded while running it
+
+    :param job_id: The id of the job
+    :param validator: The validator that ran the job
+    :param outcome: The validation result, None if the validation did not finish
+    :return: The outcome of the job
+    """
+    return BatchResult(
+        job_id,
+        outcome,
+        None,
+        validator.test_harness.limit_exceeded,
+        validator.witness_processor.producer,
+        dict(validator.test_harness.command_stats)
+    )
+
+
+def run_job(config: dict) -> BatchResult:
+    """
+    Validates a single job in its own working directory beneath the configured directory. Any
+    validation error is reported in the result rather than raised so that one bad witness does not
+    stop the rest of the batch. The working directory is removed once the job finishes, unless a
+    stacktrace was asked for, in which case it is kept for inspection.
+
+    :param config: The configuration of the job
+    :return: The outcome of the job
+    """
+    job_directory = tempfile.mkdtemp(prefix='job-', dir=config['directory'])
+    try:
+        validator = create_validator(config | {'directory': job_directory}, hooks=[])
+        validator.preprocess()
+        assumptions = validator.extract_assumptions()
+        outcome = validator.execute_test_harness(assumptions)
+    except ValidationError as err:
+        error = traceback.format_exc() if config.get('stacktrace') else err.message
+        return BatchResult(config['id'], None, error)
+    except Exception as exc:  # Anything unexpected fails this job only, not the rest of the batch
+        error = traceback.format_exc() if config.get('stacktrace') else f'{type(exc).__name__}: {exc}'
+        return BatchResult(config['id'], None, error)
+    finally:
+        if not config.get('stacktrace'):
+            shutil.rmtree(job_directory, ignore_errors=True)
+    return collect_result(config['id'], validator, outcome)
+
+
+def run_batch(jobs: List[dict], config: dict, workers: Optional[int] = None) -> Iterator[BatchResult]:
+    """
+    Validates a list of jobs across a pool of worker processes, yielding results as they finish.
+
+    :param jobs: The job configurations, as returned by load_manifest
+    :param config: Shared configuration that each job is layered on top of
+    :param workers: Number of worker processes, defaults to the number of processors
+    :return: An iterator over the job results in order of completion
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(run_job, config | job | {'show_assumptions': False}) for job in jobs
+        ]
+        for future in as_completed(futures):
+            yield future.result()
@@ -8,7 +8,8 @@ from polywit.exceptions.exceptions import \
     PositionTypeExtractionError, \
     TestHarnessError, \
     TestHarnessExecutionError, \
-    TestHarnessConstructionError
+    TestHarnessConstructionError, \
+    RemoteValidationError
 
 from polywit.exceptions.exceptions_handlers import validation_error_handler
 
@@ -23,6 +24,7 @@ __all__ = [
     'TestHarnessError',
     'TestHarnessExecutionError',
     'TestHarnessConstructionError',
+    'RemoteValidationError',
     'validation_error_handler'
 
 ]
@@ -60,3 +60,11 @@ class TestHarnessConstructionError(TestHarnessError):
 
     def __init__(self):
         super().__init__(TestHarnessConstructionError.PHASE)
+
+
+class RemoteValidationError(ValidationError):
+    PHASE = 'remote validation'
+
+    def __init__(self, message):
+        super().__init__(RemoteValidationError.PHASE)
+        self.message = message
@@ -0,0 +1,120 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ This module deals with loading the frontends and constructing a validator for a given language
+"""
+
+import importlib
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from polywit.base import Validator, ResourceLimits
+from polywit.base.hooks import ValidatorHook
+from polywit.utils import ContentCache, detect_witness_format
+
+# Steps of the test harness that can be given resource limits
+HARNESS_STEPS = ('compile', 'run')
+
+# Frontends are registered by module and class names so that a language's modules and parsers
+# are only imported once that language is chosen
+FRONTENDS = {
+    'java': (
+        'polywit.java', 'JavaFileProcessor', 'JavaWitnessProcessor', 'JavaTestHarness', 'JavaYamlWitnessProcessor'
+    ),
+    'kotlin': (
+        'polywit.kotlin', 'KotlinFileProcessor', 'KotlinWitnessProcessor', 'KotlinTestHarness',
+        'KotlinYamlWitnessProcessor'
+    )
+}
+
+
+# Configuration keys passed to each frontend's file processor as keyword arguments
+FILE_PROCESSOR_OPTIONS = {
+    'java': ('parse_jobs', 'parse_scope', 'prefilter', 'engine'),
+    'kotlin': ()
+}
+
+
+class Frontend(NamedTuple):
+    """
+    The components that make up a language frontend
+    """
+    file_processor: type
+    witness_processor: type
+    test_harness: type
+    yaml_witness_processor: type
+
+
+def load_frontend(language: str) -> Frontend:
+    """
+    Imports the components of a frontend
+
+    :param language: The frontend language
+    :return: The frontend components
+    """
+    if language not in FRONTENDS:
+        raise ValueError("Validator not yet supported")
+    module_name, *class_names = FRONTENDS[language]
+    module = importlib.import_module(module_name)
+    return Frontend(*(getattr(module, class_name) for class_name in class_names))
+
+
+def create_resource_limits(config: dict) -> Dict[str, ResourceLimits]:
+    """
+    Collects the resource limits of each test harness step from the configuration
+
+    :param config: The validation configuration, with memory limits given in MiB
+    :return: The resource limits of each step
+    """
+    limits = {}
+    for step in HARNESS_STEPS:
+        memory_limit = config.get(f'{step}_memory_limit')
+        limits[step] = ResourceLimits(
+            config.get(f'{step}_time_limit'),
+            config.get(f'{step}_cpu_limit'),
+            memory_limit * 1024 * 1024 if memory_limit is not None else None
+        )
+    return limits
+
+
+def create_cache(config: dict, namespace: Optional[str]) -> Optional[ContentCache]:
+    """
+    Opens the on-disk cache if one is configured
+
+    :param config: The validation configuration, with the cache size given in MiB
+    :param namespace: Namespace of the records in the cache, None if the caller does not use the cache
+    :return: The cache, or None if caching is disabled
+    """
+    if config.get('cache_dir') is None or namespace is None:
+        return None
+    return ContentCache(config['cache_dir'], namespace, config['cache_size'] * 1024 * 1024)
+
+
+def create_validator(config: dict, hooks: Optional[Iterable[ValidatorHook]] = None) -> Validator:
+    """
+    Builds the processors and test harness for the configured frontend and wraps them in a validator
+
+    :param config: The validation configuration, as produced by the command-line parser
+    :param hooks: Observers of the validation phases, defaults to a terminal spinner
+    :return: A validator for the requested frontend
+    """
+    frontend = load_frontend(config['language'])
+    file_processor = frontend.file_processor(
+        config['directory'],
+        config['benchmark'],
+        config['package_paths'],
+        config.get('workspace', 'copy'),
+        create_cache(config, frontend.file_processor.CACHE_NAMESPACE),
+        **{key: config[key] for key in FILE_PROCESSOR_OPTIONS[config['language']] if config.get(key) is not None}
+    )
+    if detect_witness_format(config['witness_file']) == 'yaml':
+        witness_processor_class = frontend.yaml_witness_processor
+    else:
+        witness_processor_class = frontend.witness_processor
+    witness_processor = witness_processor_class(
+        config['directory'],
+        config['witness_file'],
+        create_cache(config, witness_processor_class.CACHE_NAMESPACE)
+    )
+    test_harness = frontend.test_harness(config['directory'], create_resource_limits(config))
+    return Validator(file_processor, witness_processor, test_harness, config, hooks)
@@ -1,8 +1,10 @@
-from polywit.java.file_processors import JavaFileProcessor, JavaWitnessProcessor
+from polywit.java.file_processors import JavaFileProcessor, JavaWitnessProcessor, \
+    JavaYamlWitnessProcessor
 from polywit.java.test_harness import JavaTestHarness
 
 __all__ = [
     'JavaFileProcessor',
     'JavaWitnessProcessor',
+    'JavaYamlWitnessProcessor',
     'JavaTestHarness'
 ]
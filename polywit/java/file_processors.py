@@ -5,18 +5,54 @@
  This module deals with the processing of the witness, benchmark and packages for Java
 """
 import glob
-import re
-from distutils.dir_util import copy_tree
+import json
 import os
-from typing import List
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 
-import networkx as nx
 import javalang
 
 from polywit.exceptions import validation_error_handler, PositionTypeExtractionError, FilePreprocessingError, \
     AssumptionExtractionError, WitnessPreprocessingError
-from polywit.base import FileProcessor, WitnessProcessor
-from polywit._typing import Assumption, Position
+from polywit.base import FileProcessor, WitnessProcessor, YamlWitnessProcessor
+from polywit._typing import Position
+from polywit.utils import populate_workspace, content_hash, read_witness_graph, ContentCache, LineFilterReader, \
+    AssumptionParser, AssumptionStore, WitnessGraph, open_witness
+
+
+# When the nondet value is returned from a method rather than assigned, the assumption has no =
+JAVA_ASSUMPTION_PARSER = AssumptionParser(
+    r"=\s?(\S+)|\w+\.equals\(\"(.*)\"\)|(-?\d*\.?\d+[L]?)|(false|true|null)",
+    r"\s?(\S+)|\w+\.equals\(\"(.*)\"\)|(-?\d*\.?\d+[L]?)|(false|true|null)",
+    string_groups=(2,),
+    null_as_none=True
+)
+GDART_ASSUMPTION_PARSER = AssumptionParser(
+    r"=\s?(-?\d*\.?\d+|false|true)|\w+\.equals\(\"(.*)\"\)|\w+\.parseDouble\(\"(.*)\"\)|\w+\.parseFloat\(\"(.*)\"\)",
+    r"\s?(-?\d*\.?\d+|false|true)|\w+\.equals\(\"(.*)\"\)|\w+\.parseDouble\(\"(.*)\"\)|\w+\.parseFloat\(\"(.*)\"\)",
+    string_groups=(2,)
+)
+
+
+def sanitise_witness_line(line: bytes) -> bytes:
+    """
+    Escapes a pair of angle brackets inside a string argument of a witness line, e.g. the
+    s.equals("a<b>c") assumptions some producers write unescaped. This matches
+    re.sub(r'\\("(.*)<(.*)>(.*)"\\)', r'("\\1&lt;\\2&gt;\\3")', line) in time linear in the line: the
+    first (" and the last ") on the line, the last > before that and the last < before the >
+
+    :param line: A line of the witness, with its line ending
+    :return: The sanitised line
+    """
+    start = line.find(b'("')
+    if start < 0:
+        return line
+    end = line.rfind(b'")')
+    close = line.rfind(b'>', start + 2, end) if end >= 0 else -1
+    open_ = line.rfind(b'<', start + 2, close) if close >= 0 else -1
+    if open_ < 0:
+        return line
+    return b''.join((line[:open_], b'&lt;', line[open_ + 1:close], b'&gt;', line[close + 1:]))
 
 
 class JavaWitnessProcessor(WitnessProcessor):
@@ -24,81 +60,395 @@ class JavaWitnessProcessor(WitnessProcessor):
     A class representing the Java witness processor
     """
 
-    def __init__(self, test_directory, witness_path):
-        super().__init__(test_directory, witness_path)
+    CACHE_NAMESPACE = 'java-witness-v4'
+
+    def __init__(self, test_directory, witness_path, cache: Optional[ContentCache] = None):
+        super().__init__(test_directory, witness_path, cache)
 
     @validation_error_handler(WitnessPreprocessingError)
     def preprocess(self) -> None:
         """
         Preprocess the witness to avoid any unformatted XML
         """
-        with open(self.witness_path, 'r', encoding='utf-8') as file:
-            data = file.read()
-        # Check for malformed XML strings
-        cleaned_data = re.sub(r"\(\"(.*)<(.*)>(.*)\"\)", r'("\1&lt;\2&gt;\3")', data)
-        self.witness = nx.parse_graphml(cleaned_data)
         super().preprocess()
 
-    @staticmethod
-    def _extract_value_from_assumption(assumption: str, regex: str) -> str:
+    def _read_witness(self) -> WitnessGraph:
+        # Check for malformed XML strings as the witness is streamed into the parser
+        with open_witness(self.witness_path) as file:
+            return read_witness_graph(LineFilterReader(file, sanitise_witness_line))
+
+    @validation_error_handler(AssumptionExtractionError)
+    def _extract_assumptions(self) -> AssumptionStore:
         """
-        Extracts an assumption value using a regex
+        Extracts the assumptions along the violation path of the witness, in execution order
+        """
+        self.producer = self._get_value_from_witness('producer')
+        # GDart uses different syntax for numeric types
+        parser = GDART_ASSUMPTION_PARSER if self.producer == 'GDart' else JAVA_ASSUMPTION_PARSER
+        # An assumption without a line can never be matched to a nondet call
+        edges = [data for data in self._violation_path_data() if 'assumption.scope' in data and 'startline' in data]
+        values = parser.parse_all(data['assumption'] for data in edges)
+        assumptions = AssumptionStore()
+        for data, value in zip(edges, values):
+            assumptions.append((self._get_file_name_from_path(data['originFileName']), data['startline']), value)
+        return assumptions
+
 
-        :param assumption: The string containing the variable assignment to have value extracted
-        :param regex: The regular expression used to extract the value
-        :return: The extracted assumption value or None if not there
+class JavaYamlWitnessProcessor(YamlWitnessProcessor):
+    """
+    A class representing the Java processor of YAML witnesses
+    """
+
+    CACHE_NAMESPACE = 'java-yaml-witness-v2'
+
+    def __init__(self, test_directory, witness_path, cache: Optional[ContentCache] = None):
+        super().__init__(test_directory, witness_path, cache)
+
+    @validation_error_handler(WitnessPreprocessingError)
+    def preprocess(self) -> None:
         """
-        search_result = re.search(regex, assumption)
-        if search_result is not None:
-            matches = [sr for sr in search_result.groups() if sr is not None]
-            # Match the last capture group if multiple matches
-            assumption_value = matches[-1]
-        else:
-            # Check to see if it is because nondet comes from a function return
-            # and in which case it is not assigned to a variable so remove = match from regex
-            regex = regex[1:]
-            search_result = re.search(regex, assumption)
-            if search_result is not None:
-                matches = [sr for sr in search_result.groups() if sr is not None]
-                # Match the last capture group if multiple matches
-                assumption_value = matches[-1]
-            else:
-                assumption_value = None
-        # Strip trailing semicolon if has been missed by regex
-        if assumption_value.endswith(';'):
-            assumption_value = assumption_value[:-1]
-        # TODO Extract into new parser class and have methods handling specific edge values
-        if assumption_value == 'Double.NaN':
-            assumption_value = 'NaN'
-        return str(assumption_value)
+        Streams the waypoints of the witness and checks they form a single violation path
+        """
+        super().preprocess()
+
+    def _assumption_parser(self) -> AssumptionParser:
+        # GDart uses different syntax for numeric types
+        return GDART_ASSUMPTION_PARSER if self.producer == 'GDart' else JAVA_ASSUMPTION_PARSER
 
     @validation_error_handler(AssumptionExtractionError)
-    def extract_assumptions(self) -> List[Assumption]:
+    def _extract_assumptions(self) -> AssumptionStore:
         """
-        Extracts the assumptions from the witness
+        Extracts the assumptions from the witness waypoints
         """
-        self.producer = self._get_value_from_witness('producer')
-        assumptions = []
-        # GDart uses different syntax for numeric types
-        if self.producer == 'GDart':
-            regex = r"=\s?(-?\d*\.?\d+|false|true)|\w+\.equals\(\"(.*)\"\)|\w+\.parseDouble\(\"(" \
-                    r".*)\"\)|\w+\.parseFloat\(\"(.*)\"\)"
+        return super()._extract_assumptions()
+
+
+class SourceFacts(NamedTuple):
+    """
+    The facts of a Java source file needed to build the position type map
+
+    imports: Paths of the classes imported by the file, ending in .* for wildcard imports
+    nondet_calls: Line and type of each Verifier.nondet call
+    returning_methods: Name of each method whose first statement is a return, and the line of that return
+    invocations: Member name and line of each method invocation
+    package: Slash separated path of the package the file declares, empty for the default package
+    references: Simple names that may refer to other classes, from type references and qualifiers
+    """
+    imports: List[str]
+    nondet_calls: List[Tuple[int, str]]
+    returning_methods: List[Tuple[str, int]]
+    invocations: List[Tuple[str, Optional[int]]]
+    package: str
+    references: List[str]
+
+
+class ImportIndex(NamedTuple):
+    """
+    An index of the classes that imports can resolve to, keyed by slash separated class or package path
+
+    benchmark_classes: Benchmark files, under every trailing part of their path relative to the benchmark
+    package_classes: Package files, under their path relative to the package root they are in
+    packages: Files directly inside each package directory of the benchmark and the package roots
+    """
+    benchmark_classes: Dict[str, List[str]]
+    package_classes: Dict[str, List[str]]
+    packages: Dict[str, List[str]]
+
+
+def build_import_index(benchmark_path: str, source_files: List[str], package_paths: List[str]) -> ImportIndex:
+    """
+    Indexes the benchmark and package files so that each import is resolved with a lookup
+
+    :param benchmark_path: Path of the benchmark directory
+    :param source_files: The benchmark files
+    :param package_paths: Paths of the package roots
+    :return: The import index
+    """
+    index = ImportIndex({}, {}, {})
+    for source_file in source_files:
+        parts = os.path.relpath(source_file, benchmark_path)[:-len('.java')].split(os.sep)
+        for start in range(len(parts)):
+            index.benchmark_classes.setdefault('/'.join(parts[start:]), []).append(source_file)
+        index.packages.setdefault('/'.join(parts[:-1]), []).append(source_file)
+    for package in package_paths:
+        for package_file in sorted(glob.glob(package + "/**/*.java", recursive=True)):
+            class_path = os.path.relpath(package_file, package)[:-len('.java')].replace(os.sep, '/')
+            # Use the same path an import of the class would be given
+            class_file = "{0}.java".format(os.path.join(package, class_path))
+            index.package_classes.setdefault(class_path, []).append(class_file)
+            index.packages.setdefault(os.path.dirname(class_path), []).append(class_file)
+    return index
+
+
+def _program_name(filename: str) -> str:
+    return filename[filename.rfind("/") + 1: filename.find(".java")]
+
+
+def _import_path(path: str, static: bool, wildcard: bool) -> str:
+    # A static import names a member, so import its class instead
+    if static and not wildcard:
+        return path[:path.rfind('.')]
+    return path + '.*' if wildcard and not static else path
+
+
+def _read_header(tokens: Iterable[javalang.tokenizer.JavaToken]) -> Tuple[str, List[str]]:
+    """
+    Reads the package and import declarations from the tokens of a Java source file, stopping at
+    the first token after them
+
+    :param tokens: Tokens of the source file
+    :return: The slash separated package path, and the import paths as given by SourceFacts
+    """
+    package = ''
+    imports = []
+    declaration: Optional[List[str]] = None
+    for token in tokens:
+        if declaration is None:
+            if token.value not in ('package', 'import', ';'):
+                break
+            declaration = [token.value] if token.value != ';' else None
+        elif token.value != ';':
+            declaration.append(token.value)
+        elif declaration[0] == 'package':
+            package = ''.join(declaration[1:]).replace('.', '/')
+            declaration = None
         else:
-            regex = r"=\s?(\S+)|\w+\.equals\(\"(.*)\"\)|(-?\d*\.?\d+[L]?)|(false|true|null)"
-        for assumption_edge in filter(
-                lambda edge: ('assumption.scope' in edge[2]),
-                self.witness.edges(data=True)
-        ):
-            data = assumption_edge[2]
-            file_name = self._get_file_name_from_path(data['originFileName'])
-            line_number = data['startline']
-            scope = data['assumption.scope']
-            assumption_value = self._extract_value_from_assumption(data['assumption'], regex)
-            if assumption_value is not None:
-                if self.producer != 'GDart' and assumption_value == 'null':
-                    assumption_value = None
-                assumptions.append(((file_name, line_number), assumption_value))
-        return assumptions
+            static = declaration[1] == 'static'
+            path = ''.join(declaration[2 if static else 1:])
+            imports.append(_import_path(path.removesuffix('.*'), static, path.endswith('.*')))
+            declaration = None
+    return package, imports
+
+
+def extract_import_facts(data: str) -> SourceFacts:
+    """
+    Extracts only the package and imports of a Java source file. The file is only tokenized up to
+    its first type declaration, which is much cheaper than a full parse
+
+    :param data: Content of the source file
+    :return: The facts of the source file, with no calls, methods or references
+    """
+    package, imports = _read_header(javalang.tokenizer.tokenize(data))
+    return SourceFacts(imports, [], [], [], package, [])
+
+
+def _match_brackets(values: List[str]) -> Optional[Dict[int, int]]:
+    """
+    Pairs up the brackets of a token stream
+
+    :param values: Values of the tokens
+    :return: The index of the matching bracket for the index of every bracket, or None if they do not balance
+    """
+    pairs = {}
+    openers = []
+    for index, value in enumerate(values):
+        if value in ('(', '[', '{'):
+            openers.append(index)
+        elif value in (')', ']', '}'):
+            if not openers:
+                return None
+            opener = openers.pop()
+            pairs[opener] = index
+            pairs[index] = opener
+    return pairs if not openers else None
+
+
+class _AmbiguousTokens(Exception):
+    """
+    Raised when the tokens of a file hold a construct that cannot be told apart without the syntax tree
+    """
+
+
+def _has_ambiguous_constructs(values: List[str]) -> bool:
+    # Enum constants look like invocations, and explicit type arguments and nested selectors change the
+    # order in which the syntax tree visits invocations
+    return 'enum' in values or any(
+        value == '.' and next_value in ('<', 'super') for value, next_value in zip(values, values[1:])
+    )
+
+
+def _following_value(values: List[str], pairs: Dict[int, int], index: int) -> Optional[str]:
+    """
+    Gives the value of the token after the arguments of the identifier at index
+    """
+    after_arguments = pairs[index + 1] + 1
+    return values[after_arguments] if after_arguments < len(values) else None
+
+
+def _names_method(tokens: List[javalang.tokenizer.JavaToken], values: List[str], index: int) -> bool:
+    """
+    Whether the token at index is an identifier followed by a parenthesis that names a method, rather than
+    the class of an object creation or an annotation
+    """
+    previous = tokens[index - 1]
+    return isinstance(tokens[index], javalang.tokenizer.Identifier) and values[index + 1] == '(' \
+        and previous.value != 'new' and not isinstance(previous, javalang.tokenizer.Annotation)
+
+
+def _is_declaration(previous: javalang.tokenizer.JavaToken) -> bool:
+    """
+    Whether an identifier followed by a parenthesis names a method declaration, judged by the token before it
+    """
+    return isinstance(previous, (javalang.tokenizer.Identifier, javalang.tokenizer.BasicType)) \
+        or previous.value in ('void', ']', '>', '>>', '>>>')
+
+
+def _returning_declaration(tokens: List[javalang.tokenizer.JavaToken], values: List[str], pairs: Dict[int, int],
+                           index: int) -> Optional[Tuple[str, int]]:
+    """
+    Checks whether the method declared at index starts its body with a return statement
+
+    :return: The name of the method and the line of the return statement, or None if it does not
+    """
+    if values[index - 1] in ('>', '>>', '>>>') and _following_value(values, pairs, index) not in ('{', 'throws'):
+        raise _AmbiguousTokens()
+    # Find the start of the body
+    body = pairs[index + 1] + 1
+    while body < len(values) and values[body] not in ('{', ';'):
+        body += 1
+    if body + 1 < len(values) and values[body] == '{' and values[body + 1] == 'return':
+        return tokens[index].value, tokens[body + 1].position.line
+    return None
+
+
+def _qualified_invocation(tokens: List[javalang.tokenizer.JavaToken], values: List[str], pairs: Dict[int, int],
+                          index: int, invocation_indices: List[int]) -> Optional[Tuple[Optional[str], int]]:
+    """
+    Reads the qualifier of an invocation whose name follows a selector
+
+    :return: The qualifier, None for a selector of another expression, and the line of the invocation,
+        or None if the identifier does not name an invocation
+    """
+    # Walk back over a chain of names, e.g. org.sosy_lab.sv_benchmarks.Verifier
+    start = index - 1
+    while start >= 2 and isinstance(tokens[start - 1], javalang.tokenizer.Identifier) and values[start - 2] == '.':
+        start -= 2
+    if isinstance(tokens[start - 1], javalang.tokenizer.Identifier):
+        if start >= 2 and (values[start - 2] == 'new' or isinstance(tokens[start - 2], javalang.tokenizer.Annotation)):
+            return None
+        return ''.join(values[start - 1:index - 1]), tokens[start - 1].position.line
+    if values[start - 1] == 'super':
+        # super.method() is not a MethodInvocation, and members of super are left to the syntax tree
+        if start == index - 1:
+            return None
+        raise _AmbiguousTokens()
+    # A selector of another expression, which the syntax tree visits before any invocations in the
+    # brackets it follows
+    if values[start - 1] in (')', ']') and any(
+            pairs[start - 1] < invocation < start for invocation in invocation_indices):
+        raise _AmbiguousTokens()
+    return None, tokens[index - 1].position.line
+
+
+def _invocation(tokens: List[javalang.tokenizer.JavaToken], values: List[str], pairs: Dict[int, int],
+                index: int, invocation_indices: List[int]) -> Optional[Tuple[Optional[str], int]]:
+    """
+    Reads the qualifier and line of an invocation of the identifier at index
+
+    :return: The qualifier, empty if unqualified, and the line of the invocation, or None if the
+        identifier does not name an invocation
+    """
+    if values[index - 1] == '.':
+        return _qualified_invocation(tokens, values, pairs, index, invocation_indices)
+    if _following_value(values, pairs, index) in ('{', 'throws'):
+        # A constructor declaration
+        return None
+    return '', tokens[index].position.line
+
+
+def _locate_token_facts(tokens: List[javalang.tokenizer.JavaToken]) -> Optional[SourceFacts]:
+    """
+    Finds the facts of a Java source file from its tokens, recognising method invocations and
+    declarations by the tokens around each identifier followed by a parenthesis
+
+    :param tokens: Tokens of the source file
+    :return: The facts of the source file without references, or None if the file uses a construct
+        that cannot be told apart without the syntax tree
+    """
+    values = [token.value for token in tokens]
+    pairs = _match_brackets(values)
+    if pairs is None or _has_ambiguous_constructs(values):
+        return None
+    package, imports = _read_header(tokens)
+    nondet_calls = []
+    invocations = []
+    invocation_indices = []
+    returning_methods = []
+    try:
+        for index, token in enumerate(tokens[1:-1], start=1):
+            if not _names_method(tokens, values, index):
+                continue
+            if _is_declaration(tokens[index - 1]):
+                returning_method = _returning_declaration(tokens, values, pairs, index)
+                if returning_method is not None:
+                    returning_methods.append(returning_method)
+                continue
+            invocation = _invocation(tokens, values, pairs, index, invocation_indices)
+            if invocation is None:
+                continue
+            qualifier, line = invocation
+            if qualifier is not None and 'Verifier' in qualifier:
+                nondet_calls.append((line, token.value.replace('nondet', '').lower()))
+            invocations.append((token.value, line))
+            invocation_indices.append(index)
+    except _AmbiguousTokens:
+        return None
+    return SourceFacts(imports, nondet_calls, returning_methods, invocations, package, [])
+
+
+def extract_token_facts(data: str) -> SourceFacts:
+    """
+    Extracts the facts of a Java source file from its tokens, falling back to a full parse for
+    constructs the tokens alone do not settle. References are not extracted
+
+    :param data: Content of the source file
+    :return: The facts of the source file
+    """
+    facts = _locate_token_facts(list(javalang.tokenizer.tokenize(data)))
+    return facts if facts is not None else extract_source_facts(data)
+
+
+def extract_source_facts(data: str) -> SourceFacts:
+    """
+    Parses a Java source file and extracts its facts
+
+    :param data: Content of the source file
+    :return: The facts of the source file
+    """
+    tree = javalang.parse.parse(data)
+    imports = [_import_path(node.path, node.static, node.wildcard) for node in tree.imports]
+    nondet_calls = []
+    invocations = []
+    for _, node in tree.filter(javalang.tree.MethodInvocation):
+        if node.qualifier is not None and 'Verifier' in node.qualifier:
+            nondet_type = node.member.replace('nondet', '')
+            nondet_calls.append((node.position.line, nondet_type.lower()))
+        invocations.append((node.member, node.position.line if node.position is not None else None))
+
+    returning_methods = []
+    for _, node in tree.filter(javalang.tree.MethodDeclaration):
+        if node.body is None or len(node.body) == 0:
+            continue
+        statement = node.body[0]
+        if isinstance(statement, javalang.tree.ReturnStatement):
+            returning_methods.append((node.name, statement.position.line))
+
+    package = tree.package.name.replace('.', '/') if tree.package is not None else ''
+    references = {node.name.split('.')[0] for _, node in tree.filter(javalang.tree.ReferenceType)}
+    for node_type in (javalang.tree.MethodInvocation, javalang.tree.MemberReference):
+        for _, node in tree.filter(node_type):
+            if node.qualifier:
+                references.add(node.qualifier.split('.')[0])
+    return SourceFacts(imports, nondet_calls, returning_methods, invocations, package, sorted(references))
+
+
+EMPTY_SOURCE_FACTS = SourceFacts([], [], [], [], '', [])
+
+# Engines that extract the facts of a source file, by parsing it or by scanning its tokens
+EXTRACTION_ENGINES = {
+    'ast': extract_source_facts,
+    'tokens': extract_token_facts
+}
 
 
 class JavaFileProcessor(FileProcessor):
@@ -106,17 +456,79 @@ class JavaFileProcessor(FileProcessor):
     A class representing the Java files processor
     """
 
-    def __init__(self, test_directory, benchmark_path, package_paths):
-        super().__init__(test_directory)
+    # Bump the version whenever SourceFacts changes
+    CACHE_NAMESPACE = 'java-source-facts-v3'
+    # Class the test harness calls into, see resources/Test.java
+    ENTRY_CLASS = 'Main'
+    # Which files are parsed: every benchmark file, or only those reachable from the entry class
+    PARSE_SCOPES = ('all', 'reachable')
+    # How files that cannot add to the position type map are handled: always parsed, only tokenized
+    # for their imports, which gives the same map, or skipped along with their imports
+    PREFILTERS = ('off', 'conservative', 'skip')
+
+    def __init__(self, test_directory, benchmark_path, package_paths, workspace_mode='copy',
+                 cache: Optional[ContentCache] = None, parse_jobs: int = 1, parse_scope: str = 'all',
+                 prefilter: str = 'off', engine: str = 'ast'):
+        super().__init__(test_directory, workspace_mode, cache)
+        if parse_scope not in self.PARSE_SCOPES:
+            raise ValueError(f'Unknown parse scope {parse_scope}.')
+        if prefilter not in self.PREFILTERS:
+            raise ValueError(f'Unknown prefilter {prefilter}.')
+        if engine not in EXTRACTION_ENGINES:
+            raise ValueError(f'Unknown extraction engine {engine}.')
+        self.parse_jobs = parse_jobs
+        self.parse_scope = parse_scope
+        self.prefilter = prefilter
+        # Same package references are only found by the syntax tree
+        self.engine = engine if parse_scope == 'all' else 'ast'
         self.benchmark_path = benchmark_path
         self.package_paths = package_paths if package_paths is not None else []
         self.source_files = list(glob.glob(self.benchmark_path + "/**/*.java", recursive=True))
+        self._import_index: Optional[ImportIndex] = None
 
     @validation_error_handler(FilePreprocessingError)
     def preprocess(self) -> None:
-        copy_tree(self.benchmark_path, self.test_directory)
+        populate_workspace(self.benchmark_path, self.test_directory, self.workspace_mode)
         for package in self.package_paths:
-            copy_tree(package, self.test_directory)
+            populate_workspace(package, self.test_directory, self.workspace_mode)
+
+    @property
+    def import_index(self) -> ImportIndex:
+        """
+        The index used to resolve imports, built on first use
+        """
+        if self._import_index is None:
+            self._import_index = build_import_index(self.benchmark_path, self.source_files, self.package_paths)
+        return self._import_index
+
+    def _entry_files(self) -> List[str]:
+        """
+        The files the position type map extraction starts from
+
+        :return: Every benchmark file, or only the entry class when parsing reachable files
+        """
+        if self.parse_scope == 'all':
+            return self.source_files
+        entry_files = [
+            source_file for source_file in self.import_index.packages.get('', [])
+            if _program_name(source_file) == self.ENTRY_CLASS
+        ]
+        if len(entry_files) != 1:
+            raise ValueError(f'No {self.ENTRY_CLASS} class given in the default package of the benchmark.')
+        return entry_files
+
+    def _same_package_references(self, facts: SourceFacts) -> List[str]:
+        """
+        Finds the files of the classes a file refers to without importing them
+
+        :param facts: The facts of the referring file
+        :return: Paths of the referenced classes in the same package
+        """
+        references = set(facts.references)
+        return [
+            package_file for package_file in self.import_index.packages.get(facts.package, [])
+            if _program_name(package_file) in references
+        ]
 
     def _check_valid_import(self, import_line: str) -> List[str]:
         check_file = import_line.strip() \
@@ -125,83 +537,214 @@ class JavaFileProcessor(FileProcessor):
             .replace("import", "") \
             .replace(' ', '')
         if not check_file.startswith('java') and check_file != 'org/sosy_lab/sv_benchmarks/Verifier':
+            # Check for wildcard imports
+            if check_file.endswith('/*'):
+                package_files = self.import_index.packages.get(check_file[:-2], [])
+                if not package_files:
+                    raise ValueError(f'No package for {check_file} given in classpath.')
+                return package_files
+
             # Check in working directory
-            files_exists = [source_f.endswith("{0}.java".format(check_file)) for source_f in self.source_files]
-            if sum(files_exists) > 1:
+            benchmark_files = self.import_index.benchmark_classes.get(check_file, [])
+            if len(benchmark_files) > 1:
                 raise ValueError(f'Multiple classes for {check_file} given.')
-            if sum(files_exists) == 1:
-                # Return full path of the only existing file definition
-                return [self.source_files[files_exists.index(True)]]
+            if len(benchmark_files) == 1:
+                return benchmark_files
 
             # Check in packages
-            # Check for wildcard imports
-            if check_file.endswith('/*'):
-                wildcard_import = check_file.replace('/*', '')
-                dir_exists = [p.endswith(wildcard_import) for p in self.package_paths]
-                if sum(dir_exists) == 1:
-                    package = self.package_paths[dir_exists.index(True)]
-                    return list(glob.glob(package + "/**/*.java", recursive=True))
-
-            full_paths = ["{0}.java".format(os.path.join(directory, check_file)) for directory in self.package_paths]
-            files_exists = [os.path.exists(f_path) for f_path in full_paths]
             # Check there is only one definition for an import file and if so add to stack to check
             # for possible nondet calls
-            if not any(files_exists):
+            package_files = self.import_index.package_classes.get(check_file, [])
+            if not package_files:
                 raise ValueError(f'No class for {check_file} given in classpath.')
-            if sum(files_exists) > 1:
+            if len(package_files) > 1:
                 raise ValueError(f'Multiple classes for {check_file} given in classpath.')
-            else:
-                # Return full path of the only existing file definition
-                return [full_paths[files_exists.index(True)]]
+            return package_files
         return []
 
+    def _needs_parse(self, data: str, watched_names: Optional[Iterable[str]]) -> bool:
+        """
+        Decides from the raw content of a file whether it has to be fully parsed
+
+        :param data: Content of the source file
+        :param watched_names: Names the file has to mention to add to the position type map,
+            None if the file has to be parsed regardless
+        :return: True if the file has to be parsed
+        """
+        if self.prefilter == 'off' or watched_names is None:
+            return True
+        # Same package references are only found by a full parse
+        if self.prefilter == 'conservative' and self.parse_scope == 'reachable':
+            return True
+        return any(name in data for name in watched_names)
+
+    def _read_source_facts(self, filename: str, watched_names: Optional[Iterable[str]] = None) -> SourceFacts:
+        """
+        Reads the facts of a source file, from the cache if the file content has been seen before
+
+        :param filename: Path of the source file
+        :param watched_names: Names the file has to mention to be worth a full parse, None to always parse it
+        :return: The facts of the source file
+        """
+        key, facts, data = self._lookup_source_facts(filename)
+        if facts is None:
+            if not self._needs_parse(data, watched_names):
+                return extract_import_facts(data) if self.prefilter == 'conservative' else EMPTY_SOURCE_FACTS
+            facts = EXTRACTION_ENGINES[self.engine](data)
+            self._store_source_facts(key, facts)
+        return facts
+
+    def _lookup_source_facts(self, filename: str) -> Tuple[Optional[str], Optional[SourceFacts], str]:
+        """
+        Reads a source file and looks up its facts in the cache
+
+        :param filename: Path of the source file
+        :return: The cache key, the cached facts or None, and the content of the file
+        """
+        with open(filename, 'rb') as file:
+            data = file.read()
+        if self.cache is None:
+            return None, None, data.decode('utf-8')
+        # The engines find different facts, so keep their records apart
+        key = content_hash(data) if self.engine == 'ast' else f'{content_hash(data)}-{self.engine}'
+        record = self.cache.get(key)
+        if record is not None:
+            try:
+                return key, SourceFacts(*json.loads(record)), ''
+            except (ValueError, TypeError):
+                # A damaged record is treated as a miss and overwritten once the file has been parsed
+                pass
+        return key, None, data.decode('utf-8')
+
+    def _store_source_facts(self, key: Optional[str], facts: SourceFacts) -> None:
+        if self.cache is not None:
+            self.cache.put(key, json.dumps(facts).encode('utf-8'))
+
+    def _submit_source_facts(self, executor: Executor, filename: str) -> Optional[Tuple[Optional[str], Future]]:
+        """
+        Starts extracting the facts of a source file in a worker process
+
+        :param executor: The worker pool
+        :param filename: Path of the source file
+        :return: The cache key to store the facts under, or None if they came from the cache, and the future
+            facts. None if the prefilter leaves the decision to when the file is reached
+        """
+        key, facts, data = self._lookup_source_facts(filename)
+        if facts is not None:
+            future = Future()
+            future.set_result(facts)
+            return None, future
+        if not self._needs_parse(data, ('Verifier',)):
+            return None
+        return key, executor.submit(EXTRACTION_ENGINES[self.engine], data)
+
     @validation_error_handler(PositionTypeExtractionError)
     def extract_position_type_map(self) -> dict[Position, str]:
+        if self.parse_jobs > 1:
+            with ProcessPoolExecutor(max_workers=self.parse_jobs) as executor:
+                return self._extract_position_type_map(executor)
+        return self._extract_position_type_map(None)
+
+    def _source_facts(self, filename: str, submitted: Optional[Tuple[Optional[str], Future]],
+                      watched_names: Optional[Iterable[str]]) -> SourceFacts:
+        """
+        Gives the facts of a source file, waiting for them if the file was submitted to the worker pool
+        and reading them otherwise
+
+        :param filename: Path to the source file
+        :param submitted: The cache key and future given by _submit_source_facts, or None if not submitted
+        :param watched_names: Names a file must mention to be fully parsed, as for _read_source_facts
+        :return: The facts of the source file
+        """
+        if submitted is None:
+            return self._read_source_facts(filename, watched_names)
+        key, future = submitted
+        facts = future.result()
+        if key is not None:
+            self._store_source_facts(key, facts)
+        return facts
+
+    def _dependencies(self, facts: SourceFacts) -> List[Optional[str]]:
+        """
+        Finds the files a source file depends on through its imports, and within its package when only
+        reachable files are parsed
+        """
+        dependencies = [file for import_path in facts.imports for file in self._check_valid_import(import_path)]
+        if self.parse_scope == 'reachable':
+            dependencies.extend(self._same_package_references(facts))
+        return dependencies
+
+    @staticmethod
+    def _merge_source_facts(program_name: str, facts: SourceFacts, position_type_map: dict[Position, str],
+                            nondet_functions_map: dict[str, Position], mapped_programs: set[str]) -> None:
+        """
+        Adds the nondet calls of a source file to the position type map, directly or through calls to
+        nondet returning methods
+
+        :param program_name: Name of the program of the source file
+        :param facts: The facts of the source file
+        :param position_type_map: The position type map being built
+        :param nondet_functions_map: Position of the nondet call returned by each nondet returning method
+        :param mapped_programs: Programs with positions in the map
+        """
+        # Look for nondet Calls
+        for line, nondet_type in facts.nondet_calls:
+            position_type_map[(program_name, line)] = nondet_type
+            mapped_programs.add(program_name)
+
+        # Check if any nondet calls are from returns from methods
+        for name, line in facts.returning_methods:
+            if (program_name, line) in position_type_map:
+                nondet_functions_map[name] = (program_name, line)
+
+        # Add any nondet returning functions to list of nondet function calls
+        for member, line in facts.invocations:
+            if member in nondet_functions_map and line is not None:
+                position = nondet_functions_map[member]
+                position_type_map[(program_name, line)] = position_type_map[position]
+                mapped_programs.add(program_name)
+
+    def _extract_position_type_map(self, executor: Optional[Executor]) -> dict[Position, str]:
+        """
+        Builds the position type map. With a worker pool every known file is parsed ahead of time, and
+        files found through imports are submitted as soon as they are discovered, but the facts are always
+        merged in the same order so the map does not depend on the number of workers
+
+        :param executor: The worker pool, or None to parse each file when it is reached
+        :return: Position type map
+        """
         position_type_map: dict[Position, str] = {}
         nondet_functions_map: dict[str, Position] = {}
-        extraction_stack = dict.fromkeys(self.source_files, 0)
+        extraction_stack = dict.fromkeys(self._entry_files(), 0)
         finished_set = {}
+        # Programs with positions in the map, whose files always need a full parse
+        mapped_programs = set()
+        pending: dict[str, Optional[Tuple[Optional[str], Future]]] = {}
+
+        def prefetch(filename: str) -> None:
+            if executor is not None and filename not in pending and _program_name(filename) != 'Verifier':
+                pending[filename] = self._submit_source_facts(executor, filename)
+
+        for source_file in extraction_stack:
+            prefetch(source_file)
 
         while len(extraction_stack) > 0:
             filename, _ = extraction_stack.popitem()
             finished_set[filename] = 0
-            program_name = filename[filename.rfind("/") + 1: filename.find(".java")]
-            with open(filename, 'r', encoding='utf-8') as file:
-                data = file.read()
+            program_name = _program_name(filename)
             # Dont need to check the Verifier class
             # TODO: Change Tool definition to not pass it
             if program_name == 'Verifier':
                 continue
-            try:
-                tree = javalang.parse.parse(data)
-            except javalang.parser.JavaSyntaxError as err:
-                raise err
-            for import_node in tree.imports:
-                files = self._check_valid_import(import_node.path)
-                for file in files:
-                    if file is not None and file not in extraction_stack and file not in finished_set:
-                        extraction_stack[file] = 0
-            # Look for nondet Calls
-            for _, node in tree.filter(javalang.tree.MethodInvocation):
-                if (node is not None
-                        and node.qualifier is not None
-                        and 'Verifier' in node.qualifier):
-                    nondet_type = node.member.replace('nondet', '')
-                    position_type_map[(program_name, node.position.line)] = nondet_type.lower()
-
-            # Check if any nondet calls are from returns from methods
-            for _, node in tree.filter(javalang.tree.MethodDeclaration):
-                if node.body is None or len(node.body) == 0:
-                    continue
-                statement = node.body[0]
-                if (isinstance(statement, javalang.tree.ReturnStatement)
-                        and (program_name, statement.position.line) in position_type_map):
-                    nondet_functions_map[node.name] = (program_name, statement.position.line)
-
-            # Add any nondet returning functions to list of nondet function calls
-            for _, node in tree.filter(javalang.tree.MethodInvocation):
-                if node is not None and node.member in nondet_functions_map:
-                    position = nondet_functions_map[node.member]
-                    position_type_map[(program_name, node.position.line)] = position_type_map[position]
+            # A file can only add to the map through a nondet call or a call to a nondet returning method
+            watched_names = None if program_name in mapped_programs else ['Verifier', *nondet_functions_map]
+            facts = self._source_facts(filename, pending.pop(filename, None), watched_names)
+            for file in self._dependencies(facts):
+                if file is not None and file not in extraction_stack and file not in finished_set:
+                    extraction_stack[file] = 0
+                    prefetch(file)
+            self._merge_source_facts(program_name, facts, position_type_map, nondet_functions_map, mapped_programs)
 
+        if self.cache is not None:
+            self.cache.evict()
         return position_type_map
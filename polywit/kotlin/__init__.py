@@ -1,8 +1,10 @@
-from polywit.kotlin.file_processors import KotlinFileProcessor, KotlinWitnessProcessor
+from polywit.kotlin.file_processors import KotlinFileProcessor, KotlinWitnessProcessor, \
+    KotlinYamlWitnessProcessor
 from polywit.kotlin.test_harness import KotlinTestHarness
 
 __all__ = [
     'KotlinFileProcessor',
     'KotlinWitnessProcessor',
+    'KotlinYamlWitnessProcessor',
     'KotlinTestHarness'
 ]
@@ -4,18 +4,26 @@
 
  This module deals with the processing of the witness, benchmark and packages for Kotlin
 """
+import dataclasses
 import glob
 import os
 import re
-from distutils.dir_util import copy_tree
-from typing import List
+from typing import Dict, Optional
 
 from kopyt import node as kotlin_node, Parser
 
 from polywit.exceptions import FilePreprocessingError, PositionTypeExtractionError, WitnessPreprocessingError, \
     AssumptionExtractionError, validation_error_handler
-from polywit.base import FileProcessor, WitnessProcessor
-from polywit._typing import Assumption, Position
+from polywit.base import FileProcessor, WitnessProcessor, YamlWitnessProcessor
+from polywit._typing import Position
+from polywit.utils import populate_workspace, AssumptionParser, AssumptionStore, ContentCache
+
+
+# When the nondet value is returned from a function rather than assigned, the assumption has no =
+KOTLIN_ASSUMPTION_PARSER = AssumptionParser(
+    r"= ((-?\d*\.?\d+[L]?)|(\S+)|(false|true|null))",
+    r"((-?\d*\.?\d+[L]?)|(\S+)|(false|true|null))"
+)
 
 
 class KotlinWitnessProcessor(WitnessProcessor):
@@ -23,8 +31,10 @@ class KotlinWitnessProcessor(WitnessProcessor):
     A class representing the Kotlin witness processor
     """
 
-    def __init__(self, test_directory, witness_path):
-        super().__init__(test_directory, witness_path)
+    CACHE_NAMESPACE = 'kotlin-witness-v3'
+
+    def __init__(self, test_directory, witness_path, cache: Optional[ContentCache] = None):
+        super().__init__(test_directory, witness_path, cache)
 
     @validation_error_handler(WitnessPreprocessingError)
     def preprocess(self) -> None:
@@ -33,61 +43,58 @@ class KotlinWitnessProcessor(WitnessProcessor):
         """
         super().preprocess()
 
-    @staticmethod
-    def _extract_value_from_assumption(assumption: Assumption, regex: str) -> str:
+    @validation_error_handler(AssumptionExtractionError)
+    def _extract_assumptions(self) -> AssumptionStore:
+        """
+        Extracts the assumptions along the violation path of the witness, in execution order
         """
-        Extracts an assumption value using a regex
+        self.producer = self._get_value_from_witness('producer')
+        edges = []
+        for data in self._violation_path_data():
+            # An assumption without a line can never be matched to a nondet call
+            if 'assumption.scope' not in data or 'startline' not in data:
+                continue
+            file_name = self._get_file_name_from_path(data['originFileName'])
+            if file_name in data['assumption.scope']:
+                edges.append(((file_name, data['startline']), data['assumption']))
+        values = KOTLIN_ASSUMPTION_PARSER.parse_all(assumption for _, assumption in edges)
+        assumptions = AssumptionStore()
+        for (position, _), value in zip(edges, values):
+            assumptions.append(position, value)
+        return assumptions
 
-        :param assumption: The string containing the variable assignment to have value extracted
-        :param regex: The regular expression used to extract the value
-        :return: The extracted assumption value or None if not there
+
+class KotlinYamlWitnessProcessor(YamlWitnessProcessor):
+    """
+    A class representing the Kotlin processor of YAML witnesses. Waypoints carry no assumption
+    scope, so unlike GraphML witnesses they are not filtered by scope
+    """
+
+    CACHE_NAMESPACE = 'kotlin-yaml-witness-v1'
+
+    def __init__(self, test_directory, witness_path, cache: Optional[ContentCache] = None):
+        super().__init__(test_directory, witness_path, cache)
+
+    @validation_error_handler(WitnessPreprocessingError)
+    def preprocess(self) -> None:
         """
-        search_result = re.search(regex, assumption)
-        if search_result is not None:
-            matches = [sr for sr in search_result.groups() if sr is not None]
-            # Match the last capture group if multiple matches
-            assumption_value = matches[-1]
-        else:
-            # Check to see if it is because nondet comes from a function return
-            # and in which case it is not assigned to a variable so remove = match from regex
-            regex = regex[2:]
-            search_result = re.search(regex, assumption)
-            if search_result is not None:
-                matches = [sr for sr in search_result.groups() if sr is not None]
-                # Match the last capture group if multiple matches
-                assumption_value = matches[-1]
-            else:
-                assumption_value = None
-        # Strip trailing semicolon if has been missed by regex
-        if assumption_value.endswith(';'):
-            assumption_value = assumption_value[:-1]
-        # TODO Extract into new parser class and have methods handling specific edge values
-        if assumption_value == 'Double.NaN':
-            assumption_value = 'NaN'
-        return str(assumption_value)
+        Streams the waypoints of the witness and checks they form a single violation path
+        """
+        super().preprocess()
+
+    def _assumption_parser(self) -> AssumptionParser:
+        return KOTLIN_ASSUMPTION_PARSER
 
     @validation_error_handler(AssumptionExtractionError)
-    def extract_assumptions(self) -> List[Assumption]:
+    def _extract_assumptions(self) -> AssumptionStore:
         """
-        Extracts the assumptions from the witness
+        Extracts the assumptions from the witness waypoints
         """
-        self.producer = self._get_value_from_witness('producer')
-        assumptions = []
-        regex = r"= ((-?\d*\.?\d+[L]?)|(\S+)|(false|true|null))"
-        for assumption_edge in filter(
-                lambda edge: ('assumption.scope' in edge[2]),
-                self.witness.edges(data=True)
-        ):
-            data = assumption_edge[2]
-            file_name = self._get_file_name_from_path(data['originFileName'])
-            line_number = data['startline']
-            scope = data['assumption.scope']
-            if file_name not in scope:
-                continue
-            assumption_value = self._extract_value_from_assumption(data['assumption'], regex)
-            if assumption_value is not None:
-                assumptions.append(((file_name, line_number), assumption_value))
-        return assumptions
+        return super()._extract_assumptions()
+
+
+# Name of a function declaration, searched for from the start of the declaration
+MAIN_FUNCTION_NAME = re.compile(r'\bmain\b')
 
 
 class KotlinFileProcessor(FileProcessor):
@@ -95,32 +102,42 @@ class KotlinFileProcessor(FileProcessor):
     A class representing the Kotlin files processor
     """
 
-    def __init__(self, test_directory, benchmark_path, package_paths):
-        super().__init__(test_directory)
+    def __init__(self, test_directory, benchmark_path, package_paths, workspace_mode='copy', cache=None):
+        super().__init__(test_directory, workspace_mode, cache)
         self.benchmark_path = benchmark_path
         self.package_paths = package_paths
         self.source_files = list(glob.glob(self.benchmark_path + "/**/*.kt", recursive=True))
+        # Trees parsed during preprocessing, keyed by the source they were parsed from, for reuse
+        # when extracting the position type map
+        self._parsed_sources: Dict[str, kotlin_node.KotlinFile] = {}
 
     @validation_error_handler(FilePreprocessingError)
     def preprocess(self) -> None:
-        copy_tree(self.benchmark_path, self.test_directory)
+        populate_workspace(self.benchmark_path, self.test_directory, self.workspace_mode)
         for package in self.package_paths:
-            copy_tree(package, self.test_directory)
+            populate_workspace(package, self.test_directory, self.workspace_mode)
 
         with open(f'{self.test_directory}/Main.kt', 'r', encoding='utf-8') as file:
             data = file.read()
 
-        parser = Parser(data)
-        result = parser.parse()
-
-        # Rename main function
-        for _, node in _filter_results(result, kotlin_node.FunctionDeclaration):
-            if (node is not None
-                    and node.name == 'main'):
-                node.name = 'polywit_main'
-
-        with open(f'{self.test_directory}/Main.kt', 'w', encoding='utf-8') as file:
-            file.write(str(result))
+        result = Parser(data).parse()
+        self._parsed_sources[data] = result
+
+        # Rename main function by editing the source at each declaration, which leaves the rest of
+        # the file untouched and the parsed tree valid for the original source
+        line_offsets = [0]
+        for line in data.splitlines(keepends=True):
+            line_offsets.append(line_offsets[-1] + len(line))
+        declarations = [
+            line_offsets[node.position.line - 1] + node.position.column - 1
+            for node in _filter_results(result, kotlin_node.FunctionDeclaration)
+            if node is not None and node.name == 'main'
+        ]
+        for offset in sorted(declarations, reverse=True):
+            name = MAIN_FUNCTION_NAME.search(data, offset)
+            data = data[:name.start()] + 'polywit_main' + data[name.end():]
+
+        self.write_to_test_directory('Main.kt', data)
 
     @validation_error_handler(PositionTypeExtractionError)
     def extract_position_type_map(self) -> dict[Position, str]:
@@ -133,60 +150,91 @@ class KotlinFileProcessor(FileProcessor):
             program_name, _ = os.path.splitext(os.path.basename(file_name))
             with open(file_name, 'r', encoding='utf-8') as file:
                 data = file.read()
+            # Only a file that mentions Verifier can have nondet calls, so skip parsing the rest
+            if 'Verifier' not in data:
+                continue
 
-            parser = Parser(data)
-            result = parser.parse()
+            result = self._parsed_sources.pop(data, None)
+            if result is None:
+                result = Parser(data).parse()
 
-            position_type_map: dict[Position, str] = {}
-            for _, node in _filter_results(result, kotlin_node.PropertyDeclaration):
+            for node in _filter_results(result, kotlin_node.PropertyDeclaration):
                 if (node is not None
                         and node.value is not None
                         and hasattr(node.value, 'expression')
-                        and node.value.expression.value == 'Verifier'):
+                        and getattr(node.value.expression, 'value', None) == 'Verifier'):
                     nondet_type = node.value.suffixes[0].suffix.replace('nondet', '')
                     position_type_map[(program_name, node.position.line)] = nondet_type.lower()
 
         return position_type_map
 
 
-def _filter_results(result, pattern):
-    for path, node in _walk_tree(result.declarations):
+def _filter_results(result, pattern, with_paths=False):
+    """
+    Finds the nodes of a parsed file that match a pattern
+
+    :param result: The parsed file
+    :param pattern: A node type, or a node to compare against
+    :param with_paths: Whether to also give the ancestors of each node
+    :return: An iterator over the matching nodes, or over (path, node) pairs if with_paths is set
+    """
+    for entry in _walk_tree(result.declarations, with_paths):
+        node = entry[1] if with_paths else entry
         if (isinstance(pattern, type) and isinstance(node, pattern)) or (node == pattern):
-            yield path, node
+            yield entry
 
 
-def _walk_tree(root):
-    children = []
-    if isinstance(root, kotlin_node.FunctionDeclaration):
-        yield (), root
-        if root.body is None or root.body.sequence is None:
-            children = []
-        else:
-            children = root.body.sequence
-    elif isinstance(root, kotlin_node.ClassDeclaration):
-        yield (), root
-        if root.body is None or root.body.members is None:
-            children = []
+def _child_fields(node_type):
+    """
+    The fields of a node type that can hold child nodes, last field first
+
+    :param node_type: A node type
+    :return: Names of the fields
+    """
+    fields = _CHILD_FIELDS.get(node_type)
+    if fields is None:
+        fields = tuple(reversed([field.name for field in dataclasses.fields(node_type) if field.name != 'position']))
+        _CHILD_FIELDS[node_type] = fields
+    return fields
+
+
+_CHILD_FIELDS = {}
+_BRANCHES = (kotlin_node.Node, list, tuple)
+
+
+def _walk_tree(root, with_paths=False):
+    """
+    Visits every node below root in pre-order, including the bodies of nested declarations, blocks,
+    lambdas and control flow. The walk keeps its own stack so deeply nested code cannot exhaust the
+    recursion limit
+
+    :param root: A node or a list of nodes
+    :param with_paths: Whether to give the ancestors of each node, which costs a tuple per node
+    :return: An iterator over the nodes, or over (path, node) pairs if with_paths is set
+    """
+    # Children are pushed last first so they are visited in source order, along with their number of
+    # ancestors so the current path can be cut back to them
+    stack = [root]
+    depths = [0]
+    ancestors = []
+    while stack:
+        item = stack.pop()
+        depth = depths.pop()
+        if isinstance(item, kotlin_node.Node):
+            if with_paths:
+                del ancestors[depth:]
+                yield tuple(ancestors), item
+                ancestors.append(item)
+            else:
+                yield item
+            depth += 1
+            for field in _child_fields(type(item)):
+                child = getattr(item, field)
+                if isinstance(child, _BRANCHES):
+                    stack.append(child)
+                    depths.append(depth)
         else:
-            children = root.body.members
-    elif isinstance(root, kotlin_node.Statement):
-        statement = root.statement
-        yield (), statement
-        children = []
-        if isinstance(statement, kotlin_node.TryExpression):
-            children += [] if not statement.try_block.sequence else statement.try_block.sequence
-            children += [] if not statement.catch_blocks else statement.catch_blocks
-            children += [] if not statement.finally_block else statement.finally_block
-    elif isinstance(root, kotlin_node.CatchBlock):
-        yield (), root
-        children = root.block.sequence
-    elif isinstance(root, kotlin_node.PropertyDeclaration):
-        yield (), root
-        children = []
-    else:
-        children = root
-
-    for child in children:
-        if isinstance(child, kotlin_node.Node):
-            for path, node in _walk_tree(child):
-                yield (root,) + path, node
+            for child in reversed(item):
+                if isinstance(child, _BRANCHES):
+                    stack.append(child)
+                    depths.append(depth)
@@ -6,11 +6,11 @@
 """
 
 import os
-from typing import Tuple, List
+from typing import Dict, Optional, Tuple
 
 from polywit.exceptions import TestHarnessExecutionError, validation_error_handler, TestHarnessConstructionError
-from polywit.base import TestHarness, PolywitTestResult
-from polywit._typing import Assumption
+from polywit.base import TestHarness, PolywitTestResult, ResourceLimits
+from polywit.utils import AssumptionStore
 
 
 class KotlinTestHarness(TestHarness):
@@ -19,6 +19,9 @@ class KotlinTestHarness(TestHarness):
     of the test harness
     """
     VERIFIER_PACKAGE = 'org/polywit/benchmarks'
+    # Output fragments of the harness when the violation is reached or not
+    CORRECT_OUTPUT = 'java.lang.AssertionError'
+    INCORRECT_OUTPUT = 'polywit: Witness Spurious'
 
     VERIFIER_RESOURCE_PATH = os.path.join(
         os.path.dirname(os.path.realpath(__file__)),
@@ -29,13 +32,14 @@ class KotlinTestHarness(TestHarness):
         'resources/Test.kt'
     )
 
-    def __init__(self, directory):
+    def __init__(self, directory, limits: Optional[Dict[str, ResourceLimits]] = None):
         """
         The constructor of KotlinTestHarness collects information on the output directory
 
         :param directory: Directory that the harness will write to
+        :param limits: Resource limits of the compile and run steps
         """
-        super().__init__(directory)
+        super().__init__(directory, limits)
 
     @property
     def verifier_path(self):
@@ -74,7 +78,7 @@ class KotlinTestHarness(TestHarness):
         return ['java', '-ea', '-jar', self.jar_path]
 
     @validation_error_handler(TestHarnessConstructionError)
-    def build_test_harness(self, assumptions: List[Assumption]) -> None:
+    def build_test_harness(self, assumptions: AssumptionStore) -> None:
         """
         Constructs and compiles the test harness consisting of
         the unit tests and the test verifier
@@ -92,7 +96,7 @@ class KotlinTestHarness(TestHarness):
         test_data = self._read_data(self.TEST_RESOURCE_PATH)
         self._write_data(self.test_path, test_data)
 
-    def _build_test_verifier(self, assumptions: List[Assumption]) -> None:
+    def _build_test_verifier(self, assumptions: AssumptionStore) -> None:
         """
         Constructs the tests verifier from a list of assumptions
         and Verifier.java
@@ -103,10 +107,8 @@ class KotlinTestHarness(TestHarness):
             self.directory,
             f'{self.VERIFIER_PACKAGE}/Verifier.kt'
         )
-        # We only need assumption values so extract them
-        assumption_values = list(map(lambda assumption: assumption[1], assumptions))
-        # Map assumptions to string form, mapping None to null
-        string_assumptions = [f'"{a}"' if a is not None else 'null' for a in assumption_values]
+        # Map assumption values to string form, mapping None to null
+        string_assumptions = [f'"{a}"' if a is not None else 'null' for a in assumptions.values]
         verifier_data = self._read_data(self.VERIFIER_RESOURCE_PATH)
         # Replace empty assumptions list with extracted assumptions if they exist
         if len(string_assumptions) > 0:
@@ -123,7 +125,7 @@ class KotlinTestHarness(TestHarness):
 
         :return: stdout and stderr from compilation
         """
-        out, err = self._run_command(self.compile_cmd)
+        out, err = self._run_command(self.compile_cmd, 'compile')
         return out, err
 
     @validation_error_handler(TestHarnessExecutionError)
@@ -133,10 +135,19 @@ class KotlinTestHarness(TestHarness):
 
         :return: The test result
         """
-        out, err = self._run_command(self.run_cmd)
+        # The harness could not be compiled within its limits
+        if self.limit_exceeded is not None:
+            return PolywitTestResult.UNKNOWN
+        out, err = self._run_command(
+            self.run_cmd,
+            'run',
+            stop_markers=(self.CORRECT_OUTPUT, self.INCORRECT_OUTPUT)
+        )
+        if self.limit_exceeded is not None:
+            return PolywitTestResult.UNKNOWN
         return self._parse_test_result(
             out,
             err,
-            'java.lang.AssertionError',
-            'polywit: Witness Spurious'
+            self.CORRECT_OUTPUT,
+            self.INCORRECT_OUTPUT
         )
@@ -0,0 +1,158 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ This module deals with serving validation requests over a Unix domain socket
+"""
+
+import json
+import os
+import socket
+import socketserver
+import stat
+from typing import Iterable
+
+from polywit.exceptions import RemoteValidationError
+from polywit.base import PolywitTestResult
+from polywit.base.test_harness import CommandStats
+from polywit.batch import BatchResult, run_job
+
+# Keys that make up a job, every other setting comes from the server unless set by the client
+REQUEST_JOB_KEYS = ('language', 'benchmark', 'package_paths', 'witness_file')
+REQUEST_PATH_KEYS = ('benchmark', 'witness_file')
+# Options that only make sense on the client side of a request
+CLIENT_ONLY_KEYS = ('directory', 'server', 'show_assumptions', 'no_spinner', 'output')
+# Seconds a client has to send its request before the connection is dropped
+REQUEST_TIMEOUT = 30
+
+
+class ValidationRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles a single validation request. A request is one line of JSON holding the job
+    configuration and the response is one line of JSON holding the result or the error
+    """
+    timeout = REQUEST_TIMEOUT
+
+    def handle(self) -> None:
+        try:
+            request = self.rfile.readline()
+            if not request:
+                # The client closed the connection without a request, e.g. to check the server is running
+                return
+            job = json.loads(request)
+            config = self.server.config | job
+            config['show_assumptions'] = False
+            job_result = run_job(config)
+            response = {
+                'result': job_result.result.name if job_result.result is not None else None,
+                'error': job_result.error,
+                'reason': job_result.reason,
+                'producer': job_result.producer,
+                'commands': {step: stats._asdict() for step, stats in (job_result.command_stats or {}).items()}
+            }
+        except Exception as exc:  # Report anything unexpected to the client rather than dropping the connection
+            response = {'result': None, 'error': f'{type(exc).__name__}: {exc}'}
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class ValidationServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """
+    A resident validation server. Every request is validated in a forked child, so the frontends
+    imported by the server are reused and a failing validation cannot take the server down
+    """
+
+    def __init__(self, socket_path: str, config: dict):
+        self.config = config
+        self._remove_stale_socket(socket_path)
+        super().__init__(socket_path, ValidationRequestHandler)
+
+    @staticmethod
+    def _remove_stale_socket(socket_path: str) -> None:
+        """
+        Removes a socket left behind by a server that is no longer running. Anything else at the path,
+        including the socket of a running server, is left alone
+
+        :param socket_path: Path of the socket to listen on
+        """
+        try:
+            mode = os.stat(socket_path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f'{socket_path} already exists and is not a socket')
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(socket_path)
+            except ConnectionRefusedError:
+                os.remove(socket_path)
+                return
+        raise FileExistsError(f'A server is already listening on {socket_path}')
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def preload_frontends() -> None:
+    """
+    Imports every frontend and its parsers, which are otherwise loaded on first use, so that forked
+    children do not pay for them on every request
+    """
+    from polywit.frontends import FRONTENDS, load_frontend
+
+    for language in FRONTENDS:
+        load_frontend(language)
+    # Only needed for cyclic witnesses, but then it would be imported in every child
+    import networkx  # noqa: F401
+
+
+def serve(socket_path: str, config: dict) -> None:
+    """
+    Serves validation requests on a Unix domain socket until interrupted
+
+    :param socket_path: Path of the socket to listen on
+    :param config: Shared configuration that each request is layered on top of
+    """
+    preload_frontends()
+
+    with ValidationServer(socket_path, config) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def request_validation(socket_path: str, config: dict, options: Iterable[str] = ()) -> BatchResult:
+    """
+    Sends a validation request to a running server
+
+    :param socket_path: Path of the socket the server is listening on
+    :param config: The configuration of the job
+    :param options: Names of the options set for this job rather than left at their default. Only these
+        are sent along with the job, every other setting is taken from the server configuration
+    :return: The outcome of the job, with the reason, producer and command statistics from the server
+    """
+    job = {key: config[key] for key in options if key not in CLIENT_ONLY_KEYS}
+    job |= {key: config[key] for key in REQUEST_JOB_KEYS}
+    # The server does not share our working directory so send absolute paths
+    for key in REQUEST_PATH_KEYS:
+        job[key] = os.path.abspath(job[key])
+    job['package_paths'] = [os.path.abspath(package) for package in job['package_paths']]
+    job['id'] = job['witness_file']
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps(job).encode('utf-8') + b'\n')
+        with client.makefile('rb') as stream:
+            response = json.loads(stream.readline())
+    if response['error'] is not None:
+        raise RemoteValidationError(response['error'])
+    return BatchResult(
+        job['id'],
+        PolywitTestResult[response['result']],
+        None,
+        response['reason'],
+        response['producer'],
+        {step: CommandStats(**stats) for step, stats in response['commands'].items()}
+    )
@@ -1,5 +1,25 @@
-from polywit.utils.witness_utils import filter_assumptions
+from polywit.utils.witness_utils import filter_assumptions, detect_witness_format, open_witness, \
+    WITNESS_FORMATS
+from polywit.utils.workspace_utils import populate_workspace, replace_file, WORKSPACE_MODES
+from polywit.utils.cache_utils import ContentCache, content_hash, file_hash
+from polywit.utils.assumption_utils import AssumptionParser, AssumptionStore
+from polywit.utils.graphml_utils import read_witness_graph, WitnessGraph, WitnessEdge, LineFilterReader
 
 __all__ = [
-    'filter_assumptions'
+    'filter_assumptions',
+    'detect_witness_format',
+    'open_witness',
+    'WITNESS_FORMATS',
+    'populate_workspace',
+    'replace_file',
+    'WORKSPACE_MODES',
+    'ContentCache',
+    'content_hash',
+    'file_hash',
+    'read_witness_graph',
+    'WitnessGraph',
+    'WitnessEdge',
+    'LineFilterReader',
+    'AssumptionParser',
+    'AssumptionStore'
 ]
@@ -0,0 +1,189 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ This module deals with extracting the values of the assumptions of a witness and storing them
+"""
+
+import re
+import sys
+from array import array
+from itertools import compress
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from polywit._typing import Assumption, Position
+
+# Integer literals carrying a long suffix, which the harness parsers do not accept
+LONG_LITERAL = re.compile(r'-?\d+[lL]')
+
+
+class AssumptionParser:
+    """
+    Extracts the values of witness assumptions written in one producer's dialect. The patterns
+    are compiled once, and the value is taken from the last group that matched
+    """
+
+    def __init__(self, pattern: str, fallback_pattern: str, string_groups: Tuple[int, ...] = (),
+                 null_as_none: bool = False):
+        """
+        :param pattern: Pattern of an assumption that assigns the value to a variable
+        :param fallback_pattern: Pattern of an assumption that does not assign the value, e.g. when
+            the nondet call is returned straight from a method. Its groups are numbered as in pattern
+        :param string_groups: Groups that capture the content of a string literal, which is taken as is
+        :param null_as_none: Whether a null value stands for a null reference rather than a string
+        """
+        self.pattern = re.compile(pattern)
+        self.fallback_pattern = re.compile(fallback_pattern)
+        self.string_groups = string_groups
+        self.null_as_none = null_as_none
+
+    def parse(self, assumption: str) -> Optional[str]:
+        """
+        Extracts the value of an assumption
+
+        :param assumption: The assumption expression
+        :return: The normalised value, or None for a null reference
+        """
+        search_result = self.pattern.search(assumption) or self.fallback_pattern.search(assumption)
+        if search_result is None:
+            raise ValueError(f'No value found in assumption {assumption}.')
+        # Match the last capture group if multiple matches
+        group, value = [
+            (group, value) for group, value in enumerate(search_result.groups(), 1) if value is not None
+        ][-1]
+        if group in self.string_groups:
+            return value
+        return self.normalise(value)
+
+    def parse_all(self, assumptions: Iterable[str]) -> List[Optional[str]]:
+        """
+        Extracts the values of a batch of assumptions, parsing each distinct assumption once
+
+        :param assumptions: The assumption expressions
+        :return: The values in the same order
+        """
+        values: Dict[str, Optional[str]] = {}
+        result = []
+        for assumption in assumptions:
+            if assumption not in values:
+                values[assumption] = self.parse(assumption)
+            result.append(values[assumption])
+        return result
+
+    def normalise(self, value: str) -> Optional[str]:
+        """
+        Brings a value into the form the test harness parses
+
+        :param value: The value as written in the assumption
+        :return: The normalised value, or None for a null reference
+        """
+        # Strip trailing semicolon if has been missed by the pattern
+        if value.endswith(';'):
+            value = value[:-1]
+        if value == 'Double.NaN':
+            return 'NaN'
+        if value == 'null' and self.null_as_none:
+            return None
+        if LONG_LITERAL.fullmatch(value):
+            return value[:-1]
+        return value
+
+
+class AssumptionStore:
+    """
+    The assumptions of a witness in execution order, held as columns: the index of the file name in a
+    table of interned file names, the line number and the value of each assumption. Iterating over the
+    store yields ((file name, line), value) assumptions
+    """
+
+    def __init__(self, files: Optional[List[str]] = None, file_indices: Optional[array] = None,
+                 lines: Optional[array] = None, values: Optional[List[Optional[str]]] = None):
+        """
+        :param files: The file name table
+        :param file_indices: Index into the file name table of each assumption
+        :param lines: Line number of each assumption
+        :param values: Value of each assumption, None for a null reference
+        """
+        self.files: List[str] = files if files is not None else []
+        self.file_indices: array = file_indices if file_indices is not None else array('I')
+        self.lines: array = lines if lines is not None else array('q')
+        self.values: List[Optional[str]] = values if values is not None else []
+        self._file_ids = {file_name: index for index, file_name in enumerate(self.files)}
+
+    @classmethod
+    def from_assumptions(cls, assumptions: Iterable[Assumption]) -> 'AssumptionStore':
+        store = cls()
+        for position, value in assumptions:
+            store.append(position, value)
+        return store
+
+    @classmethod
+    def from_record(cls, record: Tuple[List[str], bytes, bytes, List[Optional[str]]]) -> 'AssumptionStore':
+        """
+        Rebuilds a store from the record given by to_record
+        """
+        files, file_indices, lines, values = record
+        return cls(list(files), array('I', file_indices), array('q', lines), list(values))
+
+    def to_record(self) -> Tuple[List[str], bytes, bytes, List[Optional[str]]]:
+        """
+        Gives the columns of the store in a form marshal can serialise
+        """
+        return self.files, self.file_indices.tobytes(), self.lines.tobytes(), self.values
+
+    def append(self, position: Position, value: Optional[str]) -> None:
+        file_name, line = position
+        file_index = self._file_ids.get(file_name)
+        if file_index is None:
+            file_index = self._file_ids[file_name] = len(self.files)
+            self.files.append(sys.intern(file_name))
+        self.file_indices.append(file_index)
+        self.lines.append(line)
+        self.values.append(value)
+
+    def filter(self, position_type_map: Dict[Position, str]) -> 'AssumptionStore':
+        """
+        Selects the assumptions at a position of the position type map. The map is translated to the
+        store's file indices once, and the mask is then computed by a single pass over the columns
+
+        :param position_type_map: A mapping from a position of a nondet call to its type
+        :return: A store of the selected assumptions, sharing the file name table
+        """
+        mapped_positions = {
+            (self._file_ids[file_name], line) for file_name, line in position_type_map if file_name in self._file_ids
+        }
+        mask = list(map(mapped_positions.__contains__, zip(self.file_indices, self.lines)))
+        return AssumptionStore(
+            self.files,
+            array('I', compress(self.file_indices, mask)),
+            array('q', compress(self.lines, mask)),
+            list(compress(self.values, mask))
+        )
+
+    def rows(self) -> Iterator[Tuple[str, int, Optional[str]]]:
+        """
+        Iterates over the assumptions as flat (file name, line, value) rows
+        """
+        files = self.files
+        for file_index, line, value in zip(self.file_indices, self.lines, self.values):
+            yield files[file_index], line, value
+
+    def __iter__(self) -> Iterator[Assumption]:
+        for file_name, line, value in self.rows():
+            yield (file_name, line), value
+
+    def __getitem__(self, index: int) -> Assumption:
+        return (self.files[self.file_indices[index]], self.lines[index]), self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AssumptionStore):
+            other = list(other)
+        if not isinstance(other, list):
+            return NotImplemented
+        return list(self) == other
+
+    def __repr__(self) -> str:
+        return f'AssumptionStore({list(self)!r})'
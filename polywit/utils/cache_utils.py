@@ -0,0 +1,141 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ This module deals with the on-disk cache of parsed source files and witnesses
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+# Fraction of the size cap the cache is trimmed down to when it overflows
+EVICTION_TARGET = 0.9
+# Prefix of the temporary files records are written to before being moved into place
+TEMP_PREFIX = '.tmp-'
+# Size of the blocks a file is read in while hashing it
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(data: bytes) -> str:
+    """
+    Hashes some content to give its cache key
+    :param data: The content to hash
+    :return: Hex digest of the content
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    """
+    Hashes the content of a file without reading it into memory at once
+    :param path: Path to the file
+    :return: Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """
+    An on-disk store of records keyed by content hash. Records are written atomically and may be
+    evicted by another process at any time, so it can be shared by concurrent polywit processes.
+    The least recently used records are evicted once the cache grows past its size cap.
+    """
+
+    def __init__(self, directory: str, namespace: str, max_size: int = DEFAULT_CACHE_SIZE):
+        """
+        :param directory: Root directory of the cache
+        :param namespace: Subdirectory for one kind of record, include a version to invalidate old records
+        :param max_size: Size cap of the namespace in bytes
+        """
+        self.directory = os.path.join(directory, namespace)
+        self.max_size = max_size
+        self._written = False
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Reads a record, marking it as recently used
+        :param key: The content hash of the record
+        :return: The record, or None if it is not cached
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Writes a record. The record is written to a temporary file and moved into place so readers never
+        see a partial record
+        :param key: The content hash of the record
+        :param data: The record
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._written = True
+
+    def _records(self) -> Iterator[Tuple[float, int, str]]:
+        """
+        Scans the records in the cache, skipping those removed while the scan runs
+
+        :return: An iterator over the modification time, size and path of each record
+        """
+        for subdirectory in os.scandir(self.directory):
+            if not subdirectory.is_dir():
+                continue
+            for entry in os.scandir(subdirectory.path):
+                # Records still being written by put belong to their writer
+                if entry.name.startswith(TEMP_PREFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                yield stat.st_mtime, stat.st_size, entry.path
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used records if the cache is over its size cap. Only scans the cache
+        if records have been written since the last eviction
+        """
+        if not self._written:
+            return
+        self._written = False
+        entries = list(self._records())
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self.max_size:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size * EVICTION_TARGET:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
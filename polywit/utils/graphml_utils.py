@@ -0,0 +1,333 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ This module deals with reading GraphML witnesses without holding the whole document in memory
+"""
+
+import sys
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+from xml.etree.ElementTree import iterparse
+
+# Attributes polywit reads from the nodes and edges of a witness, every other attribute is dropped
+WITNESS_NODE_KEYS = ('isEntryNode', 'isViolationNode')
+WITNESS_EDGE_KEYS = ('assumption', 'assumption.scope', 'originFileName', 'startline')
+
+# Conversions for the GraphML attribute types, matching networkx
+GRAPHML_TYPES: Dict[str, Callable[[str], Any]] = {
+    'boolean': lambda value: value.strip().lower() in ('true', '1'),
+    'int': int,
+    'long': int,
+    'float': float,
+    'double': float,
+    'string': str
+}
+
+
+class GraphMLKey(NamedTuple):
+    """
+    A GraphML attribute declaration
+
+    name: Name of the attribute
+    domain: What the attribute belongs to, graph, node, edge or all
+    convert: Conversion from the text of the attribute to its value
+    default: Default value, or None if there is none
+    """
+    name: str
+    domain: str
+    convert: Callable[[str], Any]
+    default: Any = None
+
+
+class WitnessEdge(NamedTuple):
+    """
+    An edge of a witness, with the kept attributes in the order of WITNESS_EDGE_KEYS, None where missing
+    """
+    source: str
+    target: str
+    values: Tuple[Any, ...]
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        return {key: value for key, value in zip(WITNESS_EDGE_KEYS, self.values) if value is not None}
+
+
+class WitnessGraph:
+    """
+    The parts of a witness automaton polywit needs: graph attributes, the entry and violation nodes,
+    the topology and the kept edge attributes
+    """
+
+    def __init__(self):
+        self.graph: Dict[str, Any] = {}
+        self.entry_nodes: List[str] = []
+        self.violation_nodes: List[str] = []
+        self.edge_list: List[WitnessEdge] = []
+        # Indices into edge_list of the edges leaving each node
+        self.successors: Dict[str, List[int]] = {}
+
+    def add_edge(self, source: str, target: str, values: Tuple[Any, ...]) -> None:
+        self.successors.setdefault(source, []).append(len(self.edge_list))
+        self.successors.setdefault(target, [])
+        self.edge_list.append(WitnessEdge(source, target, values))
+
+    def count_paths(self, source: str, target: str, limit: int = 2) -> int:
+        """
+        Counts the simple paths from source to target, stopping once limit is reached. Only the nodes
+        on some path from source to target are considered, and if those are acyclic the paths are
+        counted in a single pass over them in topological order. Parallel edges make separate paths
+
+        :param source: The first node of the paths
+        :param target: The last node of the paths
+        :param limit: The count to stop at
+        :return: The number of paths, or limit if there are at least that many
+        """
+        reachable = self._reachable(source, lambda node: (self.edge_list[index].target
+                                                          for index in self.successors.get(node, ())))
+        if target not in reachable:
+            return 0
+        predecessors: Dict[str, List[str]] = {}
+        for node in reachable:
+            for index in self.successors[node]:
+                predecessors.setdefault(self.edge_list[index].target, []).append(node)
+        relevant = self._reachable(target, lambda node: predecessors.get(node, ()))
+        paths = self._count_acyclic_paths(relevant, source, target, limit)
+        if paths is not None:
+            return paths
+        return self._count_paths_with_cycles(relevant, source, target, limit)
+
+    def _count_acyclic_paths(self, relevant: Set[str], source: str, target: str, limit: int) -> Optional[int]:
+        """
+        Counts the paths in a single pass over the relevant nodes in topological order, using Kahn's
+        algorithm and carrying the number of paths into each node
+
+        :return: The number of paths up to limit, or None if the relevant nodes contain a cycle
+        """
+        in_degrees = dict.fromkeys(relevant, 0)
+        for node in relevant:
+            for index in self.successors[node]:
+                if self.edge_list[index].target in relevant:
+                    in_degrees[self.edge_list[index].target] += 1
+        paths = dict.fromkeys(relevant, 0)
+        paths[source] = 1
+        ready = [node for node, in_degree in in_degrees.items() if in_degree == 0]
+        visited = 0
+        while ready:
+            node = ready.pop()
+            visited += 1
+            for index in self.successors[node]:
+                successor = self.edge_list[index].target
+                if successor not in relevant:
+                    continue
+                paths[successor] = min(limit, paths[successor] + paths[node])
+                in_degrees[successor] -= 1
+                if in_degrees[successor] == 0:
+                    ready.append(successor)
+        return paths[target] if visited == len(relevant) else None
+
+    def _count_paths_with_cycles(self, relevant: Set[str], source: str, target: str, limit: int) -> int:
+        """
+        Counts the simple paths by enumerating them, for when the relevant nodes contain a cycle
+        """
+        # Imported here as cyclic witnesses are rare
+        import networkx as nx
+
+        topology = nx.MultiDiGraph()
+        topology.add_nodes_from(relevant)
+        topology.add_edges_from(
+            (edge.source, edge.target) for edge in self.edge_list
+            if edge.source in relevant and edge.target in relevant
+        )
+        return sum(1 for _ in islice(nx.all_simple_paths(topology, source, target), limit))
+
+    def violation_path(self, source: str, target: str) -> List[WitnessEdge]:
+        """
+        Finds the only simple path from source to target in a single walk forward from source. At each
+        node the walk takes the one edge that can still reach target, so edges off the path are never
+        visited. Should a node have several such edges, the paths are counted to tell whether they are
+        cycles off a single path or separate paths
+
+        :param source: The first node of the path
+        :param target: The last node of the path
+        :return: The edges of the path in execution order
+        """
+        predecessors: Dict[str, List[str]] = {}
+        for edge in self.edge_list:
+            predecessors.setdefault(edge.target, []).append(edge.source)
+        reaches_target = self._reachable(target, lambda node: predecessors.get(node, ()))
+        if source not in reaches_target:
+            raise ValueError('Witness violation node is not reachable from the entry node')
+        path = []
+        visited = {source}
+        node = source
+        while node != target:
+            candidates = [index for index in self.successors[node] if self.edge_list[index].target in reaches_target]
+            if len(candidates) != 1 or self.edge_list[candidates[0]].target in visited:
+                return self._violation_path_with_cycles(source, target)
+            edge = self.edge_list[candidates[0]]
+            path.append(edge)
+            node = edge.target
+            visited.add(node)
+        return path
+
+    def _violation_path_with_cycles(self, source: str, target: str) -> List[WitnessEdge]:
+        """
+        Finds the only simple path by enumerating the paths, for when the walk meets a branch
+        """
+        if self.count_paths(source, target) > 1:
+            raise ValueError('Witness has multiple execution paths from source to sink')
+        # Imported here as cyclic witnesses are rare
+        import networkx as nx
+
+        topology = nx.MultiDiGraph()
+        topology.add_edges_from((edge.source, edge.target, index) for index, edge in enumerate(self.edge_list))
+        path = next(nx.all_simple_edge_paths(topology, source, target))
+        return [self.edge_list[index] for _, _, index in path]
+
+    @staticmethod
+    def _reachable(start: str, neighbours: Callable[[str], Iterable[str]]) -> Set[str]:
+        reached = {start}
+        stack = [start]
+        while stack:
+            for neighbour in neighbours(stack.pop()):
+                if neighbour not in reached:
+                    reached.add(neighbour)
+                    stack.append(neighbour)
+        return reached
+
+    def edges(self, data: bool = False) -> Iterator[Union[Tuple[str, str], Tuple[str, str, Dict[str, Any]]]]:
+        """
+        Iterates over the edges in document order, like networkx.DiGraph.edges
+
+        :param data: Whether to include the kept attributes of each edge
+        :return: An iterator over (source, target) or (source, target, data) tuples
+        """
+        for edge in self.edge_list:
+            yield (edge.source, edge.target, edge.data) if data else (edge.source, edge.target)
+
+
+class LineFilterReader:
+    """
+    A binary reader that passes each line of another reader through a filter as it is read, so the
+    filtered document is never held in memory as a whole
+    """
+
+    def __init__(self, source: BinaryIO, line_filter: Callable[[bytes], bytes]):
+        self._lines = iter(source)
+        self._line_filter = line_filter
+        self._buffer = bytearray()
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += self._line_filter(line)
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+
+def _local_name(tag: str) -> str:
+    return tag.rpartition('}')[2]
+
+
+def _read_key(element) -> Tuple[str, GraphMLKey]:
+    convert = GRAPHML_TYPES.get(element.get('attr.type', 'string'), str)
+    default = None
+    for child in element:
+        if _local_name(child.tag) == 'default' and child.text is not None:
+            default = convert(child.text)
+    key_id = element.get('id')
+    return key_id, GraphMLKey(element.get('attr.name', key_id), element.get('for', 'all'), convert, default)
+
+
+def _read_data(element, keys: Dict[str, GraphMLKey], wanted: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Reads the wanted attributes held by the data children of a node or edge element
+    """
+    values = {}
+    for child in element:
+        key = keys.get(child.get('key'))
+        if key is not None and key.name in wanted:
+            values[key.name] = key.convert(child.text or '')
+    return values
+
+
+def _key_defaults(keys: Dict[str, GraphMLKey]) -> Dict[str, Dict[str, Any]]:
+    """
+    Collects the default value of each node and edge attribute
+    """
+    defaults: Dict[str, Dict[str, Any]] = {'node': {}, 'edge': {}}
+    for key in keys.values():
+        if key.default is not None and key.domain in ('node', 'edge', 'all'):
+            for domain in (('node', 'edge') if key.domain == 'all' else (key.domain,)):
+                defaults[domain][key.name] = key.default
+    return defaults
+
+
+def _read_graph_data(element, keys: Dict[str, GraphMLKey], graph: WitnessGraph) -> None:
+    key = keys.get(element.get('key'))
+    name = key.name if key is not None else element.get('key')
+    graph.graph[name] = key.convert(element.text or '') if key is not None else element.text
+
+
+def _read_node(element, keys: Dict[str, GraphMLKey], defaults: Dict[str, Any], graph: WitnessGraph) -> None:
+    values = defaults | _read_data(element, keys, WITNESS_NODE_KEYS)
+    node_id = sys.intern(element.get('id'))
+    graph.successors.setdefault(node_id, [])
+    if values.get('isEntryNode'):
+        graph.entry_nodes.append(node_id)
+    if values.get('isViolationNode'):
+        graph.violation_nodes.append(node_id)
+
+
+def _read_edge(element, keys: Dict[str, GraphMLKey], defaults: Dict[str, Any], graph: WitnessGraph) -> None:
+    values = defaults | _read_data(element, keys, WITNESS_EDGE_KEYS)
+    graph.add_edge(
+        sys.intern(element.get('source')),
+        sys.intern(element.get('target')),
+        tuple(values.get(key) for key in WITNESS_EDGE_KEYS)
+    )
+
+
+def read_witness_graph(source: Union[str, BinaryIO]) -> WitnessGraph:
+    """
+    Streams a GraphML witness, keeping only what polywit needs. Each node and edge element is
+    dropped as soon as it has been read, so memory grows with the number of edges rather than the
+    size of the document
+
+    :param source: Path or binary file object of the witness
+    :return: The witness graph
+    """
+    keys: Dict[str, GraphMLKey] = {}
+    graph = WitnessGraph()
+    defaults: Dict[str, Dict[str, Any]] = {'node': {}, 'edge': {}}
+    parents = []
+    graph_element = None
+    for event, element in iterparse(source, events=('start', 'end')):
+        tag = _local_name(element.tag)
+        if event == 'start':
+            if tag == 'graph' and graph_element is None:
+                graph_element = element
+                defaults = _key_defaults(keys)
+            parents.append(tag)
+            continue
+        parents.pop()
+        if tag == 'key':
+            key_id, key = _read_key(element)
+            keys[key_id] = key
+        elif tag == 'data' and parents and parents[-1] == 'graph':
+            _read_graph_data(element, keys, graph)
+        elif tag in ('node', 'edge'):
+            (_read_node if tag == 'node' else _read_edge)(element, keys, defaults[tag], graph)
+            # Free the element now that it has been read
+            if parents[-1] == 'graph':
+                element.clear()
+                graph_element.remove(element)
+    return graph
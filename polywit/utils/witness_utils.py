@@ -1,13 +1,62 @@
-from typing import List
+import bz2
+import gzip
+import lzma
+from typing import BinaryIO, Iterable, Union
 
 from polywit._typing import Assumption, Position
+from polywit.utils.assumption_utils import AssumptionStore
 
 
-def filter_assumptions(position_type_map: dict[Position, str], assumptions: List[Assumption]) -> List[Assumption]:
+def filter_assumptions(position_type_map: dict[Position, str],
+                       assumptions: Union[AssumptionStore, Iterable[Assumption]]) -> AssumptionStore:
     """
     Filters assumptions to only contain assumptions coming from nondet function calls.
     :param position_type_map: A mapping from a position of a nondet call to its type
-    :param assumptions: A list of assumptions
-    :return: A list of assumptions values that come from nondet functions
+    :param assumptions: The assumptions, as a store or any iterable of assumptions
+    :return: A store of the assumptions that come from nondet functions
     """
-    return list(filter(lambda assumption: (assumption[0] in position_type_map), assumptions))
+    if not isinstance(assumptions, AssumptionStore):
+        assumptions = AssumptionStore.from_assumptions(assumptions)
+    return assumptions.filter(position_type_map)
+
+
+# Formats a witness can be written in, GraphML being the original exchange format
+WITNESS_FORMATS = ('graphml', 'yaml')
+# Bytes read from the start of a witness to detect its format
+FORMAT_PROBE_SIZE = 4096
+
+
+# Magic bytes of the compressed formats a witness can be stored in, and how to open each as a stream
+WITNESS_COMPRESSIONS = (
+    (b'\x1f\x8b', gzip.open),
+    (b'BZh', bz2.open),
+    (b'\xfd7zXZ\x00', lzma.open)
+)
+
+
+def open_witness(path: str) -> BinaryIO:
+    """
+    Opens a witness for reading in binary mode. A gzip, bz2 or xz compressed witness is detected by
+    its magic bytes and decompressed as it is read
+    :param path: Path to the witness
+    :return: A binary file object of the uncompressed witness
+    """
+    with open(path, 'rb') as file:
+        magic = file.read(max(len(magic) for magic, _ in WITNESS_COMPRESSIONS))
+    for compression_magic, open_compressed in WITNESS_COMPRESSIONS:
+        if magic.startswith(compression_magic):
+            return open_compressed(path, 'rb')
+    return open(path, 'rb')
+
+
+def detect_witness_format(path: str) -> str:
+    """
+    Detects the format of a witness from its first bytes, after any decompression. A GraphML witness
+    starts with an XML declaration or element, anything else is read as YAML
+    :param path: Path to the witness
+    :return: One of WITNESS_FORMATS
+    """
+    with open_witness(path) as file:
+        start = file.read(FORMAT_PROBE_SIZE)
+    start = start.removeprefix(b'\xef\xbb\xbf').lstrip()
+    return 'graphml' if start.startswith(b'<') else 'yaml'
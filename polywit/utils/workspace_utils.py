@@ -0,0 +1,94 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ This module deals with placing the benchmark and packages in the test directory
+"""
+
+import errno
+import fcntl
+import os
+import shutil
+
+WORKSPACE_MODES = ('copy', 'link')
+# Build outputs are always copied so compiling in the workspace can never write through a link into the benchmark
+COPIED_EXTENSIONS = ('.class', '.jar')
+# Linux ioctl that shares the extents of one file with another on copy-on-write filesystems
+FICLONE = 0x40049409
+# Errors meaning reflinks are not supported between the two files
+REFLINK_UNSUPPORTED_ERRORS = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS)
+
+
+def populate_workspace(source: str, destination: str, mode: str = 'copy') -> None:
+    """
+    Recreates the files of a directory tree in a workspace, replacing any files already there.
+    In link mode each file is a reflink, hardlink or symlink to the original, whichever the filesystem
+    supports first, so setting up the workspace costs little more than creating the directories.
+    Files that are rewritten in the workspace must be unlinked before writing, see replace_file.
+    :param source: The directory to recreate
+    :param destination: The workspace directory
+    :param mode: Either copy or link
+    """
+    if mode not in WORKSPACE_MODES:
+        raise ValueError(f'Unknown workspace mode {mode}')
+    if not os.path.isdir(source):
+        raise ValueError(f'{source} is not a directory')
+    reflink_supported = True
+    for root, _, files in os.walk(source, followlinks=True):
+        target_root = os.path.join(destination, os.path.relpath(root, source))
+        os.makedirs(target_root, exist_ok=True)
+        for file_name in files:
+            source_file = os.path.join(root, file_name)
+            target_file = os.path.join(target_root, file_name)
+            if os.path.lexists(target_file):
+                os.remove(target_file)
+            if mode == 'copy' or file_name.endswith(COPIED_EXTENSIONS):
+                shutil.copy2(source_file, target_file)
+                continue
+            if reflink_supported:
+                reflink_supported = _reflink(source_file, target_file)
+                if reflink_supported:
+                    continue
+            _link(source_file, target_file)
+
+
+def replace_file(path: str) -> None:
+    """
+    Removes a file before it is rewritten so that a workspace link is replaced rather than written through
+    :param path: Path of the file about to be written
+    """
+    if os.path.lexists(path):
+        os.remove(path)
+
+
+def _reflink(source_file: str, target_file: str) -> bool:
+    """
+    Creates a copy-on-write clone of a file
+    :return: False if the filesystem does not support reflinks, in which case nothing is created
+    """
+    with open(source_file, 'rb') as source, open(target_file, 'wb') as target:
+        try:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            return True
+        except OSError as exc:
+            if exc.errno not in REFLINK_UNSUPPORTED_ERRORS:
+                raise
+    os.remove(target_file)
+    return False
+
+
+def _link(source_file: str, target_file: str) -> None:
+    """
+    Hardlinks a file, falling back to a symlink and then a copy
+    """
+    try:
+        os.link(source_file, target_file)
+        return
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.abspath(source_file), target_file)
+        return
+    except OSError:
+        pass
+    shutil.copy2(source_file, target_file)
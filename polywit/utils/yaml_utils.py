@@ -0,0 +1,135 @@
+"""
+ This file is part of polywit, a poly-language execution-based violation-witness validator
+ https://github.com/polywit/polywit.
+
+ This module deals with streaming the waypoints of a YAML witness (format 2.0)
+"""
+
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# PyYAML is not a dependency of polywit, so this module is only imported once a YAML witness is read
+import yaml
+
+# The C parser is much faster but only available if PyYAML was built against libyaml
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+class Waypoint(NamedTuple):
+    """
+    A waypoint of a violation sequence
+
+    segment: Index of the segment the waypoint belongs to
+    type: Kind of the waypoint, e.g. assumption, function_return or target
+    action: Whether the waypoint is followed, avoided or cycled through
+    file_name: File of the location of the waypoint
+    line: Line of the location of the waypoint
+    constraint: Value of the constraint on the waypoint, None if there is none
+    """
+    segment: int
+    type: str
+    action: str
+    file_name: Optional[str]
+    line: Optional[int]
+    constraint: Optional[str]
+
+
+def _until(events: Iterator[yaml.Event], end_type: type) -> Iterator[yaml.Event]:
+    """
+    Yields the events that open the items of a collection, up to the event that closes it
+    """
+    for event in events:
+        if isinstance(event, end_type):
+            return
+        yield event
+
+
+def _compose(event: yaml.Event, events: Iterator[yaml.Event]) -> Any:
+    """
+    Builds the value that starts at an event, with every scalar kept as a string
+    """
+    if isinstance(event, yaml.ScalarEvent):
+        return event.value
+    if isinstance(event, yaml.SequenceStartEvent):
+        return [_compose(item, events) for item in _until(events, yaml.SequenceEndEvent)]
+    if isinstance(event, yaml.MappingStartEvent):
+        return {_compose(key, events): _compose(next(events), events) for key in _until(events, yaml.MappingEndEvent)}
+    raise ValueError(f'Unexpected YAML {type(event).__name__} in witness')
+
+
+class YamlWitnessReader:
+    """
+    Reads the waypoints of a YAML witness from the parser events. Only one waypoint is composed at a
+    time, so memory does not grow with the size of the document. The entry types and metadata are
+    collected as they are passed
+    """
+
+    def __init__(self, source: Union[str, BinaryIO]):
+        """
+        :param source: Content or binary file object of the witness
+        """
+        self.source = source
+        # Entry type and metadata of each entry of the witness
+        self.entries: List[Tuple[Optional[str], Dict[str, Any]]] = []
+        self.segments = 0
+
+    def waypoints(self) -> Iterator[Waypoint]:
+        """
+        Streams the waypoints of every segment in document order
+
+        :return: An iterator over the waypoints
+        """
+        events = yaml.parse(self.source, Loader=YAML_LOADER)
+        for event in events:
+            if isinstance(event, yaml.SequenceStartEvent):
+                break
+            if isinstance(event, (yaml.MappingStartEvent, yaml.ScalarEvent)):
+                raise ValueError('Witness is not a list of entries')
+        else:
+            return
+        for entry in _until(events, yaml.SequenceEndEvent):
+            if not isinstance(entry, yaml.MappingStartEvent):
+                raise ValueError('Witness entry is not a mapping')
+            entry_type, metadata = None, {}
+            for key in _until(events, yaml.MappingEndEvent):
+                key = _compose(key, events)
+                value = next(events)
+                if key == 'content' and isinstance(value, yaml.SequenceStartEvent):
+                    yield from self._content_waypoints(events)
+                elif key == 'entry_type':
+                    entry_type = _compose(value, events)
+                elif key == 'metadata':
+                    metadata = _compose(value, events)
+                else:
+                    _compose(value, events)
+            self.entries.append((entry_type, metadata))
+
+    def _content_waypoints(self, events: Iterator[yaml.Event]) -> Iterator[Waypoint]:
+        """
+        Streams the waypoints of the segments of an entry's content
+        """
+        for item in _until(events, yaml.SequenceEndEvent):
+            if not isinstance(item, yaml.MappingStartEvent):
+                # Content that is not made of segments, such as invariants, holds no waypoints
+                _compose(item, events)
+                continue
+            for key in _until(events, yaml.MappingEndEvent):
+                key = _compose(key, events)
+                value = next(events)
+                if key != 'segment' or not isinstance(value, yaml.SequenceStartEvent):
+                    _compose(value, events)
+                    continue
+                for waypoint in _until(events, yaml.SequenceEndEvent):
+                    waypoint = _compose(waypoint, events)
+                    if not isinstance(waypoint, dict) or not isinstance(waypoint.get('waypoint'), dict):
+                        raise ValueError(f'Segment {self.segments} holds something other than waypoints')
+                    waypoint = waypoint['waypoint']
+                    location = waypoint.get('location', {})
+                    yield Waypoint(
+                        self.segments,
+                        waypoint.get('type'),
+                        waypoint.get('action', 'follow'),
+                        location.get('file_name'),
+                        int(location['line']) if 'line' in location else None,
+                        (waypoint.get('constraint') or {}).get('value')
+                    )
+                self.segments += 1
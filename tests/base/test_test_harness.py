@@ -0,0 +1,87 @@
+import sys
+import time
+
+import pytest
+
+from polywit.base.test_harness import TestHarness, PolywitTestResult, ResourceLimits
+
+MARKER = 'polywit: Witness Spurious'
+
+
+class CommandTestHarness(TestHarness):
+    OUTPUT_BUFFER_SIZE = 1024
+
+    test_path = None
+    compile_cmd = None
+    run_cmd = None
+
+    def build_test_harness(self, assumptions):
+        pass
+
+    def run_test_harness(self):
+        return PolywitTestResult.UNKNOWN
+
+
+def python_command(script):
+    return [sys.executable, '-c', script]
+
+
+class TestRunCommand:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.harness = CommandTestHarness(str(tmp_path))
+        yield
+
+    def test_large_output_does_not_deadlock_and_is_bounded(self):
+        script = "import sys; sys.stdout.write('a' * 1000000 + 'end'); sys.stderr.write('b' * 1000000)"
+        out, err = self.harness._run_command(python_command(script), 'run')
+        assert len(out) == CommandTestHarness.OUTPUT_BUFFER_SIZE
+        assert out.endswith('end')
+        assert len(err) == CommandTestHarness.OUTPUT_BUFFER_SIZE
+        assert self.harness.output_size == 2000003
+        assert 'run' in self.harness.command_stats
+
+    def test_command_is_stopped_once_marker_is_seen(self):
+        script = f"import time; print('{MARKER}', flush=True); time.sleep(30)"
+        start = time.perf_counter()
+        out, _ = self.harness._run_command(python_command(script), stop_markers=[MARKER])
+        assert time.perf_counter() - start < 10
+        assert MARKER in out
+
+    def test_marker_split_across_reads_is_found(self):
+        script = (f"import sys, time; sys.stdout.write('{MARKER[:10]}'); sys.stdout.flush(); time.sleep(0.5); "
+                  f"sys.stdout.write('{MARKER[10:]}'); sys.stdout.flush(); time.sleep(30)")
+        start = time.perf_counter()
+        out, _ = self.harness._run_command(python_command(script), stop_markers=[MARKER])
+        assert time.perf_counter() - start < 10
+        assert out == MARKER
+
+    def test_wall_clock_limit_stops_command(self):
+        self.harness.limits = {'run': ResourceLimits(time_limit=0.5)}
+        start = time.perf_counter()
+        self.harness._run_command(python_command('import time; time.sleep(30)'), 'run')
+        assert time.perf_counter() - start < 10
+        assert self.harness.command_stats['run'].limit_exceeded == self.harness.limit_exceeded
+        assert 'wall-clock' in self.harness.limit_exceeded
+
+    def test_wall_clock_limit_applies_after_output_is_closed(self):
+        self.harness.limits = {'run': ResourceLimits(time_limit=0.5)}
+        script = 'import os, time; os.close(1); os.close(2); time.sleep(30)'
+        start = time.perf_counter()
+        self.harness._run_command(python_command(script), 'run')
+        assert time.perf_counter() - start < 10
+        assert 'wall-clock' in self.harness.limit_exceeded
+
+    def test_cpu_limit_stops_command(self):
+        self.harness.limits = {'run': ResourceLimits(cpu_limit=1)}
+        self.harness._run_command(python_command('while True: pass'), 'run')
+        stats = self.harness.command_stats['run']
+        assert stats.cpu_time < 5
+        assert 'CPU time' in stats.limit_exceeded
+
+    def test_resource_usage_is_recorded_without_limits(self):
+        self.harness._run_command(python_command("x = bytearray(64 * 1024 * 1024)"), 'run')
+        stats = self.harness.command_stats['run']
+        assert stats.limit_exceeded is None
+        assert self.harness.limit_exceeded is None
+        assert stats.max_rss >= 64 * 1024 * 1024
@@ -8,6 +8,7 @@ from tabulate import tabulate
 
 from polywit.exceptions import FileProcessorError, WitnessProcessorError, TestHarnessError
 from polywit.base.validator import Validator
+from polywit.base.hooks import Phase, PhaseEvent, ValidatorHook, TimingHook
 
 ASSUMPTION_1 = (('File1', 1), '3')
 POSITION_TYPE_1 = {('File1', 1): 'int'}
@@ -143,5 +144,57 @@ class TestValidator:
         assert self.test_harness.run_test_harness.call_count == 1
         assert mock_succeed.call_count == 1
 
-    def construct_validator(self):
-        return Validator(self.file_processor, self.witness_processor, self.test_harness, self.config)
+    def test_hooks_receive_phase_events_in_order(self):
+        hook = MagicMock(spec=ValidatorHook)
+        self.witness_processor.extract_assumptions.return_value = [ASSUMPTION_1, ASSUMPTION_2]
+        self.file_processor.extract_position_type_map.return_value = POSITION_TYPE_1
+        self.test_harness.output_size = 42
+        validator = self.construct_validator(hooks=[hook])
+        validator.preprocess()
+        validator.execute_test_harness(validator.extract_assumptions())
+
+        started = [call.args[0].phase for call in hook.on_phase_start.call_args_list]
+        ended = [call.args[0] for call in hook.on_phase_end.call_args_list]
+        assert started == list(Phase)
+        assert [event.phase for event in ended] == list(Phase)
+        assert ended[2].payload_size == len(POSITION_TYPE_1)
+        assert ended[3].payload_size == 2
+        assert ended[5].payload_size == 42
+        assert all(start.args[0].timestamp <= end.timestamp
+                   for start, end in zip(hook.on_phase_start.call_args_list, ended))
+
+    def test_hooks_are_notified_of_phase_errors(self):
+        hook = MagicMock(spec=ValidatorHook)
+        self.witness_processor.preprocess.side_effect = WitnessProcessorError()
+        validator = self.construct_validator(hooks=[hook])
+        with pytest.raises(WitnessProcessorError):
+            validator.preprocess()
+        assert hook.on_phase_end.call_count == 1
+        error_event = hook.on_phase_error.call_args.args[0]
+        assert error_event.phase == Phase.PREPROCESS_WITNESS
+        assert isinstance(error_event.error, WitnessProcessorError)
+
+    def test_timing_hook_records_completed_phases(self):
+        timing_hook = TimingHook()
+        self.file_processor.extract_position_type_map.side_effect = FileProcessorError()
+        validator = self.construct_validator(hooks=[timing_hook])
+        validator.preprocess()
+        with pytest.raises(FileProcessorError):
+            validator.extract_assumptions()
+        assert list(timing_hook.timings) == [Phase.PREPROCESS_BENCHMARK, Phase.PREPROCESS_WITNESS]
+        assert all(timing.wall_time >= 0 and timing.cpu_time >= 0 for timing in timing_hook.timings.values())
+
+    def test_timing_hook_accepts_events_without_cpu_time(self):
+        timing_hook = TimingHook()
+        timing_hook.on_phase_start(PhaseEvent(Phase.RUN_TEST_HARNESS, 1.0))
+        timing_hook.on_phase_end(PhaseEvent(Phase.RUN_TEST_HARNESS, 3.5, 12))
+        assert timing_hook.timings[Phase.RUN_TEST_HARNESS] == (2.5, None, 12)
+
+    @patch('halo.Halo.start')
+    def test_headless_validator_does_not_spin(self, mock_start):
+        validator = self.construct_validator(hooks=[])
+        validator.preprocess()
+        assert mock_start.call_count == 0
+
+    def construct_validator(self, hooks=None):
+        return Validator(self.file_processor, self.witness_processor, self.test_harness, self.config, hooks)
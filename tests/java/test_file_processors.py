@@ -0,0 +1,359 @@
+import gzip
+import os
+import random
+import re
+from unittest.mock import patch
+
+import javalang
+import pytest
+
+from polywit.java import JavaFileProcessor, JavaTestHarness, JavaWitnessProcessor, JavaYamlWitnessProcessor
+from polywit.java.file_processors import extract_source_facts, extract_token_facts, _locate_token_facts, \
+    sanitise_witness_line
+from polywit.exceptions import WitnessPreprocessingError
+from polywit.utils import ContentCache
+
+MAIN = """import org.sosy_lab.sv_benchmarks.Verifier;
+import util.Helper;
+
+public class Main {
+  static int helper() {
+    return Verifier.nondetInt();
+  }
+
+  public static void main(String[] args) {
+    int x = Verifier.nondetInt();
+    String s = Verifier.nondetString();
+    int y = helper();
+    boolean b = Helper.flag();
+    assert x != 5;
+  }
+}
+"""
+
+HELPER = """package util;
+
+import org.sosy_lab.sv_benchmarks.Verifier;
+
+public class Helper {
+  public static boolean flag() {
+    return Verifier.nondetBoolean();
+  }
+}
+"""
+
+# Constructs the token engine has to tell apart from invocations, or leave to the syntax tree
+CONSTRUCTS = """package a.b;
+
+import x.Y;
+import static x.Z.*;
+
+public class Constructs extends Base {
+  private static int field = Verifier.nondetInt();
+
+  static <T> List<T> generic() { return null; }
+
+  Constructs(int x) { super(x); }
+
+  @Deprecated public Constructs() { this(1); }
+
+  abstract int[] declared(int a) throws Exception;
+
+  int chained() {
+    int x = org.sosy_lab.sv_benchmarks.Verifier
+        .nondetInt();
+    a.b().c(1, d());
+    this.h();
+    super.k();
+    new Foo().bar();
+    boolean b = !Verifier.nondetBoolean();
+    String s = "x".length() + Foo.class.getName() + arr[0].get();
+    Runnable r = () -> Verifier.nondetLong();
+    new Foo() { public short k() { return Verifier.nondetShort(); } };
+    if (cond()) foo(); else bar(new int[] {baz()});
+    assert check(x) : message();
+    return
+        x;
+  }
+}
+"""
+
+# Each of these needs the syntax tree to find the invocations or their order
+AMBIGUOUS_CONSTRUCTS = [
+    'int x = (y) > z(1) ? 1 : 2;',
+    'List<String> l = Foo.<String>generic();',
+    'a.b(c()).d();',
+    'super.x.foo();',
+]
+
+EXPECTED_POSITION_TYPE_MAP = {
+    ('Main', 6): 'int',
+    ('Main', 10): 'int',
+    ('Main', 11): 'string',
+    ('Main', 12): 'int',
+    ('Helper', 7): 'boolean',
+}
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(data)
+
+
+class TestJavaFileProcessor:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.benchmark = os.path.join(tmp_path, 'benchmark')
+        self.package = os.path.join(tmp_path, 'package')
+        self.cache_directory = os.path.join(tmp_path, 'cache')
+        write(os.path.join(self.benchmark, 'Main.java'), MAIN)
+        write(os.path.join(self.package, 'util', 'Helper.java'), HELPER)
+        yield
+
+    def construct_file_processor(self, **kwargs):
+        return JavaFileProcessor('unused', self.benchmark, [self.package], **kwargs)
+
+    def construct_cache(self):
+        return ContentCache(self.cache_directory, JavaFileProcessor.CACHE_NAMESPACE)
+
+    def test_position_type_map_follows_imports(self):
+        position_type_map = self.construct_file_processor().extract_position_type_map()
+        assert position_type_map == EXPECTED_POSITION_TYPE_MAP
+
+    def test_warm_cache_skips_parsing(self):
+        cold_map = self.construct_file_processor(cache=self.construct_cache()).extract_position_type_map()
+        with patch('javalang.parse.parse') as mock_parse:
+            warm_map = self.construct_file_processor(cache=self.construct_cache()).extract_position_type_map()
+        assert mock_parse.call_count == 0
+        assert cold_map == warm_map == EXPECTED_POSITION_TYPE_MAP
+
+    def test_damaged_records_are_parsed_again(self):
+        self.construct_file_processor(cache=self.construct_cache()).extract_position_type_map()
+        cache = self.construct_cache()
+        for directory, _, files in os.walk(cache.directory):
+            for name in files:
+                write(os.path.join(directory, name), '["truncated')
+        position_type_map = self.construct_file_processor(cache=cache).extract_position_type_map()
+        assert position_type_map == EXPECTED_POSITION_TYPE_MAP
+
+    def test_changed_files_are_parsed_again(self):
+        self.construct_file_processor(cache=self.construct_cache()).extract_position_type_map()
+        write(os.path.join(self.benchmark, 'Main.java'), MAIN.replace('int y = helper();', 'int y = 0;'))
+        position_type_map = self.construct_file_processor(cache=self.construct_cache()).extract_position_type_map()
+        assert ('Main', 12) not in position_type_map
+
+    @pytest.mark.parametrize('parse_jobs', [1, 2])
+    def test_token_engine_gives_the_same_map(self, parse_jobs):
+        file_processor = self.construct_file_processor(engine='tokens', parse_jobs=parse_jobs)
+        assert file_processor.extract_position_type_map() == EXPECTED_POSITION_TYPE_MAP
+
+    @pytest.mark.parametrize('parse_jobs', [2, 4])
+    def test_parallel_parsing_gives_the_same_map(self, parse_jobs):
+        position_type_map = self.construct_file_processor(parse_jobs=parse_jobs).extract_position_type_map()
+        assert position_type_map == EXPECTED_POSITION_TYPE_MAP
+
+    @pytest.mark.parametrize('import_line', ['import util.*;', 'import static util.Helper.flag;'])
+    def test_wildcard_and_static_imports_are_resolved(self, import_line):
+        write(os.path.join(self.benchmark, 'Main.java'), MAIN.replace('import util.Helper;', import_line))
+        position_type_map = self.construct_file_processor().extract_position_type_map()
+        assert position_type_map == EXPECTED_POSITION_TYPE_MAP
+
+    def test_duplicate_package_classes_are_rejected(self):
+        other_package = os.path.join(os.path.dirname(self.package), 'other')
+        write(os.path.join(other_package, 'util', 'Helper.java'), HELPER)
+        file_processor = JavaFileProcessor('unused', self.benchmark, [self.package, other_package])
+        with pytest.raises(ValueError, match='Multiple classes'):
+            file_processor._check_valid_import('util.Helper')
+
+    def test_reachable_scope_skips_unreachable_files(self):
+        unused = HELPER.replace('package util;\n', '').replace('Helper', 'Unused')
+        write(os.path.join(self.benchmark, 'Unused.java'), unused)
+        write(os.path.join(self.benchmark, 'Local.java'), unused.replace('Unused', 'Local'))
+        write(os.path.join(self.benchmark, 'Main.java'), MAIN.replace('assert', 'Local.flag();\n    assert'))
+        all_map = self.construct_file_processor().extract_position_type_map()
+        reachable_map = self.construct_file_processor(parse_scope='reachable').extract_position_type_map()
+        assert ('Unused', 6) in all_map
+        assert reachable_map == {key: value for key, value in all_map.items() if key[0] != 'Unused'}
+        assert ('Local', 6) in reachable_map
+
+    @pytest.mark.parametrize('parse_jobs', [1, 2])
+    def test_conservative_prefilter_gives_the_same_map(self, parse_jobs):
+        write(os.path.join(self.benchmark, 'Main.java'), MAIN.replace('import util.Helper;', 'import util.Bridge;'))
+        write(os.path.join(self.package, 'util', 'Bridge.java'),
+              'package util;\n\nimport util.Helper;\n\npublic class Bridge {\n}\n')
+        full_map = self.construct_file_processor().extract_position_type_map()
+        with patch('javalang.parse.parse', wraps=javalang.parse.parse) as mock_parse:
+            filtered_map = self.construct_file_processor(
+                prefilter='conservative', parse_jobs=parse_jobs
+            ).extract_position_type_map()
+        skipped_map = self.construct_file_processor(prefilter='skip').extract_position_type_map()
+        assert filtered_map == full_map == EXPECTED_POSITION_TYPE_MAP
+        if parse_jobs == 1:
+            assert mock_parse.call_count == 2
+        assert ('Helper', 7) not in skipped_map
+
+
+WITNESS = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+ <key attr.name="isEntryNode" attr.type="boolean" for="node" id="entry"><default>false</default></key>
+ <key attr.name="isViolationNode" attr.type="boolean" for="node" id="violation"><default>false</default></key>
+ <key attr.name="originFileName" attr.type="string" for="edge" id="originfile"/>
+ <key attr.name="startline" attr.type="int" for="edge" id="startline"/>
+ <key attr.name="assumption" attr.type="string" for="edge" id="assumption"/>
+ <key attr.name="assumption.scope" attr.type="string" for="edge" id="assumption.scope"/>
+ <key attr.name="producer" attr.type="string" for="graph" id="producer"/>
+ <graph edgedefault="directed">
+  <data key="producer">JBMC</data>
+  <node id="N0"><data key="entry">true</data></node>
+  <node id="N1"/>
+  <node id="N2"><data key="violation">true</data></node>
+  <edge source="N0" target="N1"><data key="originfile">Main.java</data><data key="startline">9</data>
+   <data key="assumption">x = 5L;</data><data key="assumption.scope">Main</data></edge>
+  <edge source="N1" target="N2"><data key="originfile">Main.java</data><data key="startline">10</data>
+   <data key="assumption">s.equals("a<b>c")</data><data key="assumption.scope">Main</data></edge>
+ </graph>
+</graphml>
+"""
+
+
+class TestJavaWitnessProcessor:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.witness_path = os.path.join(tmp_path, 'witness.graphml')
+        self.cache_directory = os.path.join(tmp_path, 'cache')
+        write(self.witness_path, WITNESS)
+        yield
+
+    def construct_witness_processor(self):
+        cache = ContentCache(self.cache_directory, JavaWitnessProcessor.CACHE_NAMESPACE)
+        return JavaWitnessProcessor('unused', self.witness_path, cache)
+
+    def test_warm_cache_skips_parsing(self):
+        cold_processor = self.construct_witness_processor()
+        cold_processor.preprocess()
+        cold_assumptions = cold_processor.extract_assumptions()
+        with patch('polywit.base.file_processors.read_witness_graph') as mock_read, \
+                patch('polywit.java.file_processors.read_witness_graph') as mock_java_read:
+            warm_processor = self.construct_witness_processor()
+            warm_processor.preprocess()
+            warm_assumptions = warm_processor.extract_assumptions()
+        assert mock_read.call_count == mock_java_read.call_count == 0
+        assert cold_assumptions == warm_assumptions == [(('Main', 9), '5'), (('Main', 10), 'a<b>c')]
+        assert (warm_processor.entry_node, warm_processor.violation_node, warm_processor.producer) == \
+               ('N0', 'N2', 'JBMC')
+
+    def test_assumptions_follow_the_violation_path(self):
+        edges = WITNESS[WITNESS.index('  <edge'):WITNESS.index(' </graph>')]
+        first_edge, second_edge = edges[:edges.index('  <edge', 1)], edges[edges.index('  <edge', 1):]
+        # Write the edges out of execution order, with a branch that never reaches the violation
+        branch = first_edge.replace('target="N1"', 'target="N3"').replace('N0', 'N1').replace('x = 5L', 'y = 1')
+        write(self.witness_path, WITNESS.replace(edges, second_edge + branch + first_edge))
+        processor = JavaWitnessProcessor('unused', self.witness_path)
+        processor.preprocess()
+        assert processor.extract_assumptions() == [(('Main', 9), '5'), (('Main', 10), 'a<b>c')]
+
+    def test_compressed_witness_is_read(self):
+        with gzip.open(self.witness_path + '.gz', 'wt', encoding='utf-8') as file:
+            file.write(WITNESS)
+        processor = JavaWitnessProcessor('unused', self.witness_path + '.gz')
+        processor.preprocess()
+        assert processor.extract_assumptions() == [(('Main', 9), '5'), (('Main', 10), 'a<b>c')]
+
+    def test_changed_witness_is_parsed_again(self):
+        processor = self.construct_witness_processor()
+        processor.preprocess()
+        processor.extract_assumptions()
+        write(self.witness_path, WITNESS.replace('x = 5L;', 'x = 6;'))
+        processor = self.construct_witness_processor()
+        processor.preprocess()
+        assert processor.extract_assumptions()[0] == (('Main', 9), '6')
+
+
+YAML_WITNESS = """- entry_type: violation_sequence
+  metadata:
+    format_version: "2.0"
+    producer: {name: JBMC, version: "5.0"}
+  content:
+    - segment:
+        - waypoint:
+            type: assumption
+            action: follow
+            location: {file_name: "Main.java", line: 9}
+            constraint: {value: "x == 5L"}
+    - segment:
+        - waypoint:
+            type: assumption
+            action: avoid
+            location: {file_name: "Main.java", line: 10}
+            constraint: {value: 's.equals("b")'}
+        - waypoint:
+            type: assumption
+            action: follow
+            location: {file_name: "Main.java", line: 10}
+            constraint: {value: 's.equals("a<b>c")'}
+    - segment:
+        - waypoint:
+            type: target
+            action: follow
+            location: {file_name: "Main.java", line: 12}
+"""
+
+
+class TestJavaYamlWitnessProcessor:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.witness_path = os.path.join(tmp_path, 'witness.yml')
+        yield
+
+    def construct_witness_processor(self, witness):
+        write(self.witness_path, witness)
+        return JavaYamlWitnessProcessor('unused', self.witness_path)
+
+    def test_followed_waypoints_give_the_assumptions(self):
+        processor = self.construct_witness_processor(YAML_WITNESS)
+        processor.preprocess()
+        assert processor.producer == 'JBMC'
+        assert processor.extract_assumptions() == [(('Main', 9), '5'), (('Main', 10), 'a<b>c')]
+
+    @pytest.mark.parametrize('witness,message', [
+        (YAML_WITNESS.replace('action: avoid', 'action: follow'), 'more than one followed waypoint'),
+        (YAML_WITNESS.replace('action: avoid', 'action: cycle'), 'multiple execution paths'),
+        (YAML_WITNESS.replace('type: target', 'type: assumption'), 'does not have a target waypoint'),
+        (YAML_WITNESS.replace('entry_type: violation_sequence', 'entry_type: invariant_set'),
+         'non violation-witnesses'),
+    ])
+    def test_non_linear_witnesses_are_rejected(self, witness, message):
+        with pytest.raises(WitnessPreprocessingError) as exc_info:
+            self.construct_witness_processor(witness).preprocess()
+        assert isinstance(exc_info.value.__cause__, ValueError)
+        assert message in str(exc_info.value.__cause__)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+class TestExtractionEngines:
+    @pytest.mark.parametrize('data', [
+        MAIN, HELPER, CONSTRUCTS, read(JavaTestHarness.TEST_RESOURCE_PATH), read(JavaTestHarness.VERIFIER_RESOURCE_PATH)
+    ])
+    def test_token_engine_matches_syntax_tree(self, data):
+        token_facts = _locate_token_facts(list(javalang.tokenizer.tokenize(data)))
+        assert token_facts is not None
+        assert token_facts[:5] == extract_source_facts(data)[:5]
+
+    @pytest.mark.parametrize('statement', AMBIGUOUS_CONSTRUCTS)
+    def test_ambiguous_constructs_fall_back_to_syntax_tree(self, statement):
+        data = f'public class Main {{\n  void f() {{\n    {statement}\n  }}\n}}\n'
+        assert _locate_token_facts(list(javalang.tokenizer.tokenize(data))) is None
+        assert extract_token_facts(data) == extract_source_facts(data)
+
+
+def test_sanitiser_matches_regex():
+    generator = random.Random(0)
+    for _ in range(20000):
+        line = ''.join(generator.choice('("<>)a') for _ in range(generator.randint(0, 14))) + '\n'
+        expected = re.sub(r"\(\"(.*)<(.*)>(.*)\"\)", r'("\1&lt;\2&gt;\3")', line)
+        assert sanitise_witness_line(line.encode('utf-8')).decode('utf-8') == expected
@@ -0,0 +1,69 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from polywit.kotlin import KotlinFileProcessor
+from polywit.kotlin import file_processors
+
+MAIN = """import org.sosy_lab.sv_benchmarks.Verifier
+
+// Calls main through Test.kt
+fun main(args: Array<String>) {
+    val x = Verifier.nondetInt()
+    val domain = "main"
+    assert(x != 5)
+}
+"""
+
+HELPER = """import org.sosy_lab.sv_benchmarks.Verifier
+
+fun helper(): Boolean {
+    val b = Verifier.nondetBoolean()
+    return b
+}
+"""
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(data)
+
+
+class TestKotlinFileProcessor:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.benchmark = os.path.join(tmp_path, 'benchmark')
+        self.test_directory = os.path.join(tmp_path, 'test')
+        write(os.path.join(self.benchmark, 'Main.kt'), MAIN)
+        write(os.path.join(self.benchmark, 'Helper.kt'), HELPER)
+        os.makedirs(self.test_directory)
+        yield
+
+    def test_main_is_renamed_in_place(self):
+        KotlinFileProcessor(self.test_directory, self.benchmark, []).preprocess()
+        with open(os.path.join(self.test_directory, 'Main.kt'), 'r', encoding='utf-8') as file:
+            assert file.read() == MAIN.replace('fun main', 'fun polywit_main')
+
+    def test_main_is_parsed_once(self):
+        file_processor = KotlinFileProcessor(self.test_directory, self.benchmark, [])
+        with patch.object(file_processors, 'Parser', wraps=file_processors.Parser) as mock_parser:
+            file_processor.preprocess()
+            position_type_map = file_processor.extract_position_type_map()
+        assert mock_parser.call_count == 2
+        assert position_type_map == {('Main', 5): 'int', ('Helper', 4): 'boolean'}
+
+    def test_nested_nondet_calls_are_found(self):
+        write(os.path.join(self.benchmark, 'Helper.kt'), """import org.sosy_lab.sv_benchmarks.Verifier
+
+fun helper(flag: Boolean) {
+    if (flag) {
+        listOf(1).forEach { val b = Verifier.nondetBoolean() }
+    } else {
+        while (flag) { val l = Verifier.nondetLong() }
+    }
+}
+""")
+        position_type_map = KotlinFileProcessor(self.test_directory, self.benchmark, []).extract_position_type_map()
+        assert position_type_map == {('Main', 5): 'int', ('Helper', 5): 'boolean', ('Helper', 7): 'long'}
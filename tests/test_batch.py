@@ -0,0 +1,94 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from polywit.base import PolywitTestResult
+from polywit.base.test_harness import CommandStats
+from polywit.batch import load_manifest, run_job, run_batch
+
+JOB_1 = {'id': 'job', 'language': 'java', 'benchmark': 'bench', 'witness_file': 'witness.graphml',
+         'package_paths': ['pkg']}
+JOB_2 = {'language': 'kotlin', 'benchmark': '/abs/bench', 'witness_file': 'witness.graphml'}
+
+
+class TestLoadManifest:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.directory = tmp_path
+        self.manifest_path = os.path.join(tmp_path, 'manifest.jsonl')
+        yield
+
+    def write_manifest(self, *lines):
+        with open(self.manifest_path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines))
+
+    def test_paths_are_resolved_against_manifest_directory(self):
+        self.write_manifest(json.dumps(JOB_1), '', json.dumps(JOB_2))
+        jobs = load_manifest(self.manifest_path)
+        assert len(jobs) == 2
+        assert jobs[0]['benchmark'] == os.path.join(self.directory, 'bench')
+        assert jobs[0]['package_paths'] == [os.path.join(self.directory, 'pkg')]
+        assert jobs[1]['benchmark'] == '/abs/bench'
+        assert jobs[1]['package_paths'] == []
+
+    def test_jobs_without_id_are_numbered(self):
+        self.write_manifest(json.dumps(JOB_1), json.dumps(JOB_2))
+        jobs = load_manifest(self.manifest_path)
+        assert [job['id'] for job in jobs] == ['job', '1']
+
+    @pytest.mark.parametrize('line', [
+        '{not json', json.dumps({'language': 'java'}), json.dumps(JOB_1 | {'language': 'cobol'})
+    ])
+    def test_invalid_manifest_lines_are_rejected(self, line):
+        self.write_manifest(line)
+        with pytest.raises(ValueError):
+            load_manifest(self.manifest_path)
+
+
+class TestRunJob:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.directory = tmp_path
+        yield
+
+    @patch('polywit.batch.create_validator')
+    def test_result_is_returned(self, mock_create_validator):
+        validator = mock_create_validator.return_value
+        validator.execute_test_harness.return_value = PolywitTestResult.CORRECT
+        validator.test_harness.limit_exceeded = None
+        validator.test_harness.command_stats = {'run': CommandStats(1.0, 0.5, 1024)}
+        validator.witness_processor.producer = 'JBMC'
+        assert run_job(self.job_config()) == (
+            'job', PolywitTestResult.CORRECT, None, None, 'JBMC', {'run': CommandStats(1.0, 0.5, 1024)}
+        )
+
+    @patch('polywit.batch.create_validator')
+    def test_unexpected_errors_are_reported(self, mock_create_validator):
+        mock_create_validator.side_effect = OSError('No space left on device')
+        assert run_job(self.job_config()) == ('job', None, 'OSError: No space left on device', None, None, None)
+
+    @patch('polywit.batch.create_validator')
+    def test_job_directory_is_removed_when_finished(self, mock_create_validator):
+        run_job(self.job_config())
+        job_directory = mock_create_validator.call_args.args[0]['directory']
+        assert os.path.dirname(job_directory) == str(self.directory)
+        assert os.listdir(self.directory) == []
+
+    @patch('polywit.batch.create_validator')
+    def test_job_directory_is_kept_with_stacktrace(self, mock_create_validator):
+        mock_create_validator.side_effect = OSError('No space left on device')
+        run_job(self.job_config() | {'stacktrace': True})
+        assert len(os.listdir(self.directory)) == 1
+
+    def job_config(self):
+        return {'id': 'job', 'directory': str(self.directory)}
+
+
+def test_failing_jobs_do_not_stop_the_batch(tmp_path):
+    jobs = [JOB_1 | {'id': 'unknown', 'language': 'cobol'}, JOB_1 | {'id': 'missing', 'benchmark': str(tmp_path)}]
+    results = run_batch(jobs, {'directory': str(tmp_path), 'stacktrace': False}, workers=2)
+    results = {result.job_id: result for result in results}
+    assert set(results) == {'unknown', 'missing'}
+    assert all(result.result is None and result.error for result in results.values())
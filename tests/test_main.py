@@ -0,0 +1,51 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ['networkx', 'javalang', 'kopyt', 'halo', 'tabulate']
+
+CHECK_IMPORTED_MODULES = """
+import sys
+{statement}
+print(' '.join(module for module in {modules} if module in sys.modules))
+"""
+
+
+def imported_heavy_modules(statement: str) -> list:
+    """
+    Runs a statement in a fresh interpreter and reports which heavy modules it imported
+    """
+    script = CHECK_IMPORTED_MODULES.format(statement=statement, modules=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, check=True, text=True)
+    return output.stdout.split()
+
+
+@pytest.mark.parametrize('statement', [
+    'import polywit.__main__',
+    'from polywit.__main__ import create_argument_parser; create_argument_parser()',
+    'from polywit.server import request_validation',
+])
+def test_start_up_does_not_import_frontends(statement):
+    assert imported_heavy_modules(statement) == []
+
+
+@pytest.mark.parametrize('language,unexpected_module', [
+    ('java', 'kopyt'),
+    ('kotlin', 'javalang'),
+])
+def test_frontend_only_imports_its_own_parser(language, unexpected_module):
+    statement = f"from polywit.frontends import load_frontend; load_frontend('{language}')"
+    imported = imported_heavy_modules(statement)
+    assert unexpected_module not in imported
+    assert 'tabulate' not in imported
+
+
+def test_only_options_set_on_the_command_line_are_explicit():
+    from polywit.__main__ import create_argument_parser, explicit_options
+
+    parser = create_argument_parser()
+    config = vars(parser.parse_args(['java', '.', '--witness', 'witness.graphml', '--run-time-limit', '5',
+                                     '--engine', 'tokens', '--server', 'polywit.sock']))
+    options = set(explicit_options(parser, config))
+    assert options == {'language', 'benchmark', 'witness_file', 'engine', 'run_time_limit', 'server'}
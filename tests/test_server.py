@@ -0,0 +1,168 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import pytest
+
+from polywit.base import PolywitTestResult
+from polywit.base.test_harness import CommandStats
+from polywit.batch import BatchResult
+from polywit.exceptions import RemoteValidationError
+from polywit.server import ValidationServer, request_validation
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIG = {
+    'language': 'java',
+    'benchmark': 'bench',
+    'package_paths': ['pkg'],
+    'witness_file': 'witness.graphml',
+    'directory': '/client/only',
+    'server': None,
+    'stacktrace': False
+}
+
+
+class TestValidationServer:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.socket_path = os.path.join(tmp_path, 'polywit.sock')
+        self.server = ValidationServer(self.socket_path, {'directory': str(tmp_path)})
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        yield
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    @patch('polywit.server.run_job')
+    def test_result_is_returned_to_client(self, mock_run_job):
+        mock_run_job.return_value = BatchResult('job', PolywitTestResult.CORRECT, None)
+        self.thread.start()
+        assert request_validation(self.socket_path, CONFIG).result == PolywitTestResult.CORRECT
+
+    @patch('polywit.server.run_job')
+    def test_reason_and_stats_are_returned_to_client(self, mock_run_job):
+        stats = {'run': CommandStats(2.0, 1.5, 4096, 'run exceeded the CPU time limit of 1s')}
+        mock_run_job.return_value = BatchResult(
+            'job', PolywitTestResult.UNKNOWN, None, 'run exceeded the CPU time limit of 1s', 'JBMC', stats
+        )
+        self.thread.start()
+        job_result = request_validation(self.socket_path, CONFIG)
+        assert job_result.result == PolywitTestResult.UNKNOWN
+        assert job_result.reason == 'run exceeded the CPU time limit of 1s'
+        assert (job_result.producer, job_result.command_stats) == ('JBMC', stats)
+
+    @patch('polywit.server.run_job')
+    def test_error_is_raised_in_client(self, mock_run_job):
+        mock_run_job.return_value = BatchResult('job', None, 'Something went wrong')
+        self.thread.start()
+        with pytest.raises(RemoteValidationError) as exc_info:
+            request_validation(self.socket_path, CONFIG)
+        assert exc_info.value.message == 'Something went wrong'
+
+    @patch('polywit.server.run_job')
+    def test_unset_options_are_taken_from_server(self, mock_run_job):
+        # Report the configuration the server ran the job with back to the client
+        mock_run_job.side_effect = lambda config: BatchResult('job', None, json.dumps(config))
+        self.server.config |= {'run_time_limit': 5.0, 'cache_dir': '/server/cache'}
+        self.thread.start()
+        client_config = CONFIG | {'run_time_limit': None, 'cache_dir': None, 'run_cpu_limit': 3}
+        with pytest.raises(RemoteValidationError) as exc_info:
+            request_validation(self.socket_path, client_config, ['directory', 'run_cpu_limit'])
+        job_config = json.loads(exc_info.value.message)
+        assert job_config['directory'] == self.server.config['directory']
+        assert (job_config['run_time_limit'], job_config['cache_dir']) == (5.0, '/server/cache')
+        assert job_config['run_cpu_limit'] == 3
+        assert job_config['benchmark'] == os.path.abspath('bench')
+
+    def test_job_directory_is_removed(self, tmp_path):
+        self.thread.start()
+        with pytest.raises(RemoteValidationError):
+            request_validation(self.socket_path, CONFIG | {'language': 'cobol'})
+        assert os.listdir(tmp_path) == ['polywit.sock']
+
+    def test_socket_is_removed_on_close(self):
+        self.thread.start()
+        self.server.shutdown()
+        self.server.server_close()
+        assert not os.path.exists(self.socket_path)
+
+
+@contextmanager
+def server_process(socket_path):
+    """
+    Runs a server in its own process, as a forked handler would hold on to the client sockets of this one
+    """
+    script = (
+        'from polywit.server import ValidationRequestHandler, ValidationServer\n'
+        'ValidationRequestHandler.timeout = 0.5\n'
+        f'server = ValidationServer({socket_path!r}, {{}})\n'
+        'print("ready", flush=True)\n'
+        'server.serve_forever()\n'
+    )
+    with subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE, text=True,
+                          env=os.environ | {'PYTHONPATH': PACKAGE_ROOT}) as server:
+        try:
+            assert server.stdout.readline().strip() == 'ready'
+            yield
+        finally:
+            server.kill()
+
+
+def test_running_server_socket_is_kept(tmp_path):
+    socket_path = os.path.join(tmp_path, 'polywit.sock')
+    with server_process(socket_path):
+        with pytest.raises(FileExistsError):
+            ValidationServer(socket_path, {})
+        assert os.path.exists(socket_path)
+
+
+def test_silent_clients_are_dropped(tmp_path):
+    socket_path = os.path.join(tmp_path, 'polywit.sock')
+    with server_process(socket_path), socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.settimeout(10)
+        with client.makefile('rb') as stream:
+            response = json.loads(stream.readline())
+    assert response['result'] is None and response['error'].startswith('TimeoutError')
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    socket_path = os.path.join(tmp_path, 'polywit.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    server = ValidationServer(socket_path, {})
+    server.server_close()
+
+
+def test_other_files_are_not_removed(tmp_path):
+    socket_path = os.path.join(tmp_path, 'polywit.sock')
+    with open(socket_path, 'w', encoding='utf-8') as file:
+        file.write('data')
+    with pytest.raises(FileExistsError):
+        ValidationServer(socket_path, {})
+    assert os.path.isfile(socket_path)
+
+
+def test_frontends_are_preloaded_before_serving(tmp_path):
+    # Run in a fresh interpreter, as other tests will already have imported the frontends
+    script = (
+        'import sys\n'
+        'from unittest.mock import patch\n'
+        'from polywit import server\n'
+        'modules = ("javalang", "kopyt", "networkx", "polywit.java", "polywit.kotlin")\n'
+        'loaded_early = [module for module in modules if module in sys.modules]\n'
+        'def serve_forever(self):\n'
+        '    print(loaded_early, [module for module in modules if module not in sys.modules])\n'
+        'with patch.object(server.ValidationServer, "serve_forever", serve_forever):\n'
+        f'    server.serve({os.path.join(tmp_path, "polywit.sock")!r}, {{}})\n'
+    )
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                            env=os.environ | {'PYTHONPATH': PACKAGE_ROOT})
+    assert output.stdout.strip() == '[] []'
@@ -0,0 +1,67 @@
+import marshal
+
+import pytest
+
+from polywit.utils import AssumptionStore, filter_assumptions
+from polywit.java.file_processors import JAVA_ASSUMPTION_PARSER, GDART_ASSUMPTION_PARSER
+from polywit.kotlin.file_processors import KOTLIN_ASSUMPTION_PARSER
+
+
+@pytest.mark.parametrize('parser, assumption, value', [
+    (JAVA_ASSUMPTION_PARSER, 'x = 5;', '5'),
+    (JAVA_ASSUMPTION_PARSER, 'x = 7L;', '7'),
+    (JAVA_ASSUMPTION_PARSER, 'x = -7L;', '-7'),
+    (JAVA_ASSUMPTION_PARSER, 'x = 1.5;', '1.5'),
+    (JAVA_ASSUMPTION_PARSER, 'x = Double.NaN;', 'NaN'),
+    (JAVA_ASSUMPTION_PARSER, 'x = null;', None),
+    (JAVA_ASSUMPTION_PARSER, 's.equals("a b");', 'a b'),
+    (JAVA_ASSUMPTION_PARSER, 's.equals("123L")', '123L'),
+    (JAVA_ASSUMPTION_PARSER, 's.equals("null")', 'null'),
+    (JAVA_ASSUMPTION_PARSER, 's.equals("Double.NaN;")', 'Double.NaN;'),
+    (JAVA_ASSUMPTION_PARSER, 'return 3;', '3'),
+    (GDART_ASSUMPTION_PARSER, 'x = -2', '-2'),
+    (GDART_ASSUMPTION_PARSER, 'Double.parseDouble("0.25")', '0.25'),
+    (GDART_ASSUMPTION_PARSER, 's.equals("null")', 'null'),
+    (GDART_ASSUMPTION_PARSER, 's.equals("-5l")', '-5l'),
+    (KOTLIN_ASSUMPTION_PARSER, 'x = 12L', '12'),
+    (KOTLIN_ASSUMPTION_PARSER, 'x = true', 'true'),
+    (KOTLIN_ASSUMPTION_PARSER, 'x = Double.NaN', 'NaN'),
+    (KOTLIN_ASSUMPTION_PARSER, 'x = null', 'null'),
+    (KOTLIN_ASSUMPTION_PARSER, '42', '42'),
+])
+def test_parse(parser, assumption, value):
+    assert parser.parse(assumption) == value
+
+
+def test_parse_all_keeps_order():
+    assumptions = ['x = 1;', 'y = 2L;', 'x = 1;', 'z = null;']
+    assert JAVA_ASSUMPTION_PARSER.parse_all(assumptions) == ['1', '2', '1', None]
+
+
+def test_parse_without_value():
+    with pytest.raises(ValueError):
+        GDART_ASSUMPTION_PARSER.parse('')
+
+
+ASSUMPTIONS = [(('Main', 3), '1'), (('Helper', 3), None), (('Main', 4), 'a b'), (('Main', 3), '2')]
+
+
+def test_store_interns_file_names():
+    store = AssumptionStore.from_assumptions(ASSUMPTIONS)
+    assert store.files == ['Main', 'Helper']
+    assert list(store.file_indices) == [0, 1, 0, 0]
+    assert list(store) == ASSUMPTIONS
+    assert store[1] == (('Helper', 3), None)
+
+
+def test_filter_matches_file_and_line():
+    store = AssumptionStore.from_assumptions(ASSUMPTIONS)
+    position_type_map = {('Main', 3): 'int', ('Other', 4): 'int', ('Helper', 4): 'String'}
+    assert filter_assumptions(position_type_map, store) == [(('Main', 3), '1'), (('Main', 3), '2')]
+    assert filter_assumptions(position_type_map, ASSUMPTIONS) == store.filter(position_type_map)
+
+
+def test_record_round_trip():
+    store = AssumptionStore.from_assumptions(ASSUMPTIONS)
+    record = marshal.loads(marshal.dumps(store.to_record()))
+    assert AssumptionStore.from_record(record) == store
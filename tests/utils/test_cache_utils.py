@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from polywit.utils import ContentCache, content_hash
+
+
+class TestContentCache:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.directory = str(tmp_path)
+        yield
+
+    def test_records_round_trip(self):
+        cache = ContentCache(self.directory, 'records-v1')
+        key = content_hash(b'source')
+        assert cache.get(key) is None
+        cache.put(key, b'facts')
+        assert cache.get(key) == b'facts'
+        assert ContentCache(self.directory, 'records-v1').get(key) == b'facts'
+
+    def test_namespaces_are_separate(self):
+        key = content_hash(b'source')
+        ContentCache(self.directory, 'records-v1').put(key, b'facts')
+        assert ContentCache(self.directory, 'records-v2').get(key) is None
+
+    def test_least_recently_used_records_are_evicted(self):
+        cache = ContentCache(self.directory, 'records-v1', max_size=250)
+        keys = [content_hash(bytes([index])) for index in range(3)]
+        for age, key in enumerate(keys):
+            cache.put(key, b'x' * 100)
+            # Make the records' use times distinct and ordered
+            os.utime(cache._path(key), (age, age))
+        cache.get(keys[0])
+        cache.evict()
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[2]) is not None
+
+    def test_records_being_written_are_not_evicted(self):
+        cache = ContentCache(self.directory, 'records-v1', max_size=50)
+        key = content_hash(b'source')
+        cache.put(key, b'x' * 100)
+        temp_path = os.path.join(os.path.dirname(cache._path(key)), '.tmp-writer')
+        with open(temp_path, 'wb') as file:
+            file.write(b'x' * 100)
+        os.utime(temp_path, (0, 0))
+        cache.evict()
+        assert os.path.exists(temp_path)
+        assert cache.get(key) is None
@@ -0,0 +1,98 @@
+import io
+
+import networkx as nx
+import pytest
+
+from polywit.utils import read_witness_graph, WitnessGraph, LineFilterReader
+from polywit.utils.graphml_utils import WITNESS_EDGE_KEYS
+
+WITNESS = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+ <key attr.name="isEntryNode" attr.type="boolean" for="node" id="entry"><default>false</default></key>
+ <key attr.name="isViolationNode" attr.type="boolean" for="node" id="violation"><default>false</default></key>
+ <key attr.name="originFileName" attr.type="string" for="edge" id="originfile"/>
+ <key attr.name="startline" attr.type="int" for="edge" id="startline"/>
+ <key attr.name="assumption" attr.type="string" for="edge" id="assumption"/>
+ <key attr.name="assumption.scope" attr.type="string" for="edge" id="assumption.scope"/>
+ <key attr.name="threadId" attr.type="string" for="edge" id="threadId"/>
+ <key attr.name="producer" attr.type="string" for="graph" id="producer"/>
+ <graph edgedefault="directed">
+  <data key="producer">JBMC</data>
+  <node id="N0"><data key="entry">true</data></node>
+  <node id="N1"/>
+  <node id="N2"><data key="violation">true</data></node>
+  <edge source="N0" target="N1"><data key="originfile">Main.java</data><data key="startline">9</data>
+   <data key="assumption">x = 5;</data><data key="assumption.scope">Main</data><data key="threadId">0</data></edge>
+  <edge source="N1" target="N2"><data key="originfile">Main.java</data><data key="startline">12</data></edge>
+ </graph>
+</graphml>
+"""
+
+
+def test_witness_graph_matches_networkx():
+    witness = read_witness_graph(io.BytesIO(WITNESS.encode('utf-8')))
+    expected = nx.parse_graphml(WITNESS)
+    assert witness.graph['producer'] == expected.graph['producer']
+    assert witness.entry_nodes == [node for node, entry in expected.nodes.data('isEntryNode') if entry]
+    assert witness.violation_nodes == [node for node, violation in expected.nodes.data('isViolationNode') if violation]
+    assert list(witness.edges(data=True)) == [
+        (source, target, {key: value for key, value in data.items() if key in WITNESS_EDGE_KEYS})
+        for source, target, data in expected.edges(data=True)
+    ]
+
+
+def build_graph(edges):
+    graph = WitnessGraph()
+    for source, target in edges:
+        graph.add_edge(source, target, ())
+    return graph
+
+
+@pytest.mark.parametrize('edges,expected', [
+    ([('E', 'A'), ('A', 'V')], 1),
+    ([('E', 'A'), ('E', 'B'), ('A', 'V'), ('B', 'V')], 2),
+    ([('E', 'A'), ('A', 'V'), ('A', 'V')], 2),
+    ([('E', 'A'), ('A', 'V'), ('A', 'D'), ('D', 'D')], 1),
+    ([('E', 'A'), ('A', 'V'), ('A', 'B'), ('B', 'A')], 1),
+    ([('E', 'A'), ('A', 'B'), ('B', 'A'), ('B', 'V'), ('A', 'V')], 2),
+    ([('E', 'A')], 0),
+])
+def test_paths_are_counted_up_to_the_limit(edges, expected):
+    assert build_graph(edges).count_paths('E', 'V') == expected
+
+
+@pytest.mark.parametrize('edges,expected', [
+    ([('E', 'A'), ('A', 'V')], 'EAV'),
+    ([('A', 'V'), ('X', 'Y'), ('E', 'A'), ('E', 'D')], 'EAV'),
+    ([('E', 'A'), ('A', 'V'), ('A', 'D'), ('D', 'D')], 'EAV'),
+    ([('E', 'A'), ('A', 'V'), ('A', 'B'), ('B', 'A')], 'EAV'),
+    ([('E', 'A'), ('A', 'B'), ('B', 'A'), ('B', 'V')], 'EABV'),
+])
+def test_violation_path_follows_the_only_path(edges, expected):
+    path = build_graph(edges).violation_path('E', 'V')
+    assert ''.join(edge.source for edge in path) + 'V' == expected
+
+
+@pytest.mark.parametrize('edges', [
+    [('E', 'A'), ('E', 'B'), ('A', 'V'), ('B', 'V')],
+    [('E', 'A'), ('A', 'V'), ('A', 'V')],
+    [('E', 'A'), ('A', 'B'), ('B', 'A'), ('B', 'V'), ('A', 'V')],
+    [('E', 'A')],
+])
+def test_violation_path_rejects_ambiguous_witnesses(edges):
+    with pytest.raises(ValueError):
+        build_graph(edges).violation_path('E', 'V')
+
+
+def test_diamonds_stop_at_the_limit():
+    edges = []
+    for index in range(200):
+        edges += [(f'N{index}', f'L{index}'), (f'N{index}', f'R{index}'),
+                  (f'L{index}', f'N{index + 1}'), (f'R{index}', f'N{index + 1}')]
+    assert build_graph(edges).count_paths('N0', 'N200', limit=3) == 3
+
+
+def test_line_filter_reader_filters_every_line():
+    reader = LineFilterReader(io.BytesIO(b'one\ntwo\nthree'), bytes.upper)
+    assert reader.read(2) + reader.read(5) + reader.read() == b'ONE\nTWO\nTHREE'
+    assert reader.read(10) == b''
@@ -0,0 +1,28 @@
+import bz2
+import gzip
+import lzma
+
+import pytest
+
+from polywit.utils import detect_witness_format, open_witness
+
+
+@pytest.mark.parametrize('start,expected', [
+    (b'<?xml version="1.0" encoding="UTF-8"?>\n<graphml>', 'graphml'),
+    (b'\xef\xbb\xbf\n  <graphml>', 'graphml'),
+    (b'- entry_type: violation_sequence\n', 'yaml'),
+    (b'# comment\n- entry_type: violation_sequence\n', 'yaml'),
+])
+def test_witness_format_is_detected(tmp_path, start, expected):
+    path = tmp_path / 'witness'
+    path.write_bytes(start)
+    assert detect_witness_format(str(path)) == expected
+
+
+@pytest.mark.parametrize('compress', [lambda data: data, gzip.compress, bz2.compress, lzma.compress])
+def test_compressed_witnesses_are_read_transparently(tmp_path, compress):
+    path = tmp_path / 'witness'
+    path.write_bytes(compress(b'<graphml>\n</graphml>\n'))
+    with open_witness(str(path)) as file:
+        assert list(file) == [b'<graphml>\n', b'</graphml>\n']
+    assert detect_witness_format(str(path)) == 'graphml'
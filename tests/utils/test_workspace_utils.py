@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from polywit.utils import populate_workspace, replace_file
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(data)
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+class TestPopulateWorkspace:
+    @pytest.fixture(autouse=True)
+    def set_up(self, tmp_path):
+        self.source = os.path.join(tmp_path, 'benchmark')
+        self.workspace = os.path.join(tmp_path, 'workspace')
+        write(os.path.join(self.source, 'Main.java'), 'main')
+        write(os.path.join(self.source, 'org', 'example', 'Util.java'), 'util')
+        write(os.path.join(self.source, 'Main.class'), 'bytecode')
+        yield
+
+    @pytest.mark.parametrize('mode', ['copy', 'link'])
+    def test_tree_is_recreated(self, mode):
+        populate_workspace(self.source, self.workspace, mode)
+        assert read(os.path.join(self.workspace, 'Main.java')) == 'main'
+        assert read(os.path.join(self.workspace, 'org', 'example', 'Util.java')) == 'util'
+        assert read(os.path.join(self.workspace, 'Main.class')) == 'bytecode'
+
+    def test_build_outputs_are_never_linked(self):
+        populate_workspace(self.source, self.workspace, 'link')
+        workspace_class = os.path.join(self.workspace, 'Main.class')
+        assert not os.path.islink(workspace_class)
+        assert not os.path.samefile(workspace_class, os.path.join(self.source, 'Main.class'))
+
+    def test_replaced_files_do_not_change_the_benchmark(self):
+        populate_workspace(self.source, self.workspace, 'link')
+        workspace_main = os.path.join(self.workspace, 'Main.java')
+        replace_file(workspace_main)
+        write(workspace_main, 'rewritten')
+        assert read(os.path.join(self.source, 'Main.java')) == 'main'
+        assert read(workspace_main) == 'rewritten'
+
+    def test_existing_files_are_overwritten(self):
+        write(os.path.join(self.workspace, 'Main.java'), 'stale')
+        populate_workspace(self.source, self.workspace, 'link')
+        assert read(os.path.join(self.workspace, 'Main.java')) == 'main'
+
+    def test_unknown_mode_is_rejected(self):
+        with pytest.raises(ValueError):
+            populate_workspace(self.source, self.workspace, 'move')